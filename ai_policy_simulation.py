@@ -5,6 +5,7 @@ A probabilistic, longitudinal model for frontier AI development
 
 import numpy as np
 from dataclasses import dataclass
+from statistics import NormalDist
 from typing import Dict, List, Tuple
 import json
 
@@ -43,6 +44,84 @@ class CountryParams:
     grid_saturation_threshold: float = None  # Max % of grid that can be used for AI datacenters
 
 
+@dataclass
+class SimulationState:
+    """Checkpoint at the end of a simulation run, sufficient to extend it"""
+    years: int  # Number of years simulated so far
+    samples: int
+    us_progress: np.ndarray  # Progress in the last simulated year
+    china_progress: np.ndarray
+    rng_state: tuple  # RandomState.get_state() after the last simulated year
+    us_initial_twh_per_compute: float
+    china_initial_twh_per_compute: float
+
+
+# Series AIProgressSimulation.get_confidence_intervals always covers, since
+# the final-year median intervals are read off them
+PROGRESS_KEYS = ['us_progress', 'china_progress']
+
+# Percentile bands reported by AIProgressSimulation.get_summary_statistics
+PERCENTILES = {'p10': 10, 'p25': 25, 'p50': 50, 'p75': 75, 'p90': 90}
+
+# Keys of the results dictionary returned by AIProgressSimulation.run_simulation
+RESULT_KEYS = [
+    'us_progress', 'china_progress', 'us_training_capacity', 'china_training_capacity',
+    'us_compute', 'us_capital', 'us_talent', 'us_energy',
+    'china_compute', 'china_capital', 'china_talent', 'china_energy',
+    # New energy model metrics
+    'us_total_grid', 'us_energy_available', 'us_energy_required',
+    'china_total_grid', 'china_energy_available', 'china_energy_required',
+]
+
+
+class SimulationWorkspace:
+    """
+    Preallocated result and scratch buffers reused across simulation runs
+
+    Passing the same workspace to successive AIProgressSimulation runs with
+    the same number of samples avoids allocating the (years, samples) result
+    arrays and the per-year temporaries. Results returned by a run alias the
+    workspace and are overwritten by the next run that uses it, so copy them
+    or take them with detach_results if they need to outlive it. A workspace
+    must not be shared between threads.
+    """
+
+    def __init__(self, samples: int, years: int = 0):
+        self.samples = samples
+        self._block = np.empty((len(RESULT_KEYS), 0, samples))
+        self._scratch = []
+        self.reserve(years)
+
+    def reserve(self, years: int):
+        """Make sure result buffers for at least `years` years are allocated"""
+        if years > self._block.shape[1]:
+            self._block = np.empty((len(RESULT_KEYS), years, self.samples))
+
+    def results(self, years: int) -> Dict[str, np.ndarray]:
+        """Result arrays for a run of `years` years"""
+        self.reserve(years)
+        return {key: self._block[i, :years] for i, key in enumerate(RESULT_KEYS)}
+
+    def detach_results(self, years: int) -> Dict[str, np.ndarray]:
+        """
+        Hand the results of the last `years`-year run over to the caller
+
+        The workspace forgets its result buffers, so the returned arrays are
+        not overwritten by later runs (the next run allocates new buffers).
+        """
+        block = self._block[:, :years]
+        if self._block.shape[1] != years:
+            block = block.copy()  # Don't keep the unused years of a longer run alive
+        self._block = np.empty((len(RESULT_KEYS), 0, self.samples))
+        return dict(zip(RESULT_KEYS, block))
+
+    def scratch(self, count: int) -> List[np.ndarray]:
+        """The first `count` scratch arrays of length `samples`"""
+        while len(self._scratch) < count:
+            self._scratch.append(np.empty(self.samples))
+        return self._scratch[:count]
+
+
 class AIProgressSimulation:
     """
     Monte Carlo simulation of AI frontier model development
@@ -52,12 +131,26 @@ class AIProgressSimulation:
     """
 
     def __init__(self, us_params: CountryParams, china_params: CountryParams,
-                 years: int = 10, samples: int = 100):
+                 years: int = 10, samples: int = 100,
+                 workspace: 'SimulationWorkspace' = None, seed: int = None):
         self.us_params = us_params
         self.china_params = china_params
         self.years = years
         self.samples = samples
 
+        # Each simulation draws from its own stream so that concurrent runs
+        # (e.g. threaded server requests) cannot interleave their samples.
+        # seed=None seeds it from the OS, giving every scenario fresh draws.
+        self.rng = np.random.RandomState(seed)
+
+        # Optional preallocated buffers; results then alias the workspace
+        if workspace is not None and workspace.samples != samples:
+            raise ValueError('Workspace was allocated for a different number of samples')
+        self.workspace = workspace
+
+        # Checkpoint of the last run, used to extend it (see extend_simulation)
+        self.state = None
+
         # Contribution weights (based on AI research suggesting compute is most critical)
         self.weights = {
             'compute': 0.40,      # Compute is the primary bottleneck
@@ -66,8 +159,22 @@ class AIProgressSimulation:
             'energy': 0.10        # Energy is enabling but less constraining currently
         }
 
+    def _scratch(self, count: int) -> List[np.ndarray]:
+        """
+        Scratch arrays of length `samples` (from the workspace if one is set)
+
+        Every helper that calls this gets the same arrays back (e.g. the `term`
+        of _calculate_progress is the `growth` of _sample_factor), so a helper
+        using scratch must never call another one while its own scratch
+        values are still needed, and must not keep them after returning.
+        """
+        if self.workspace is not None:
+            return self.workspace.scratch(count)
+        return [np.empty(self.samples) for _ in range(count)]
+
     def _sample_factor(self, mean: float, std: float, growth_rate: float,
-                      constraint: float, year: int, is_energy: bool = False) -> np.ndarray:
+                      constraint: float, year: int, is_energy: bool = False,
+                      out: np.ndarray = None) -> np.ndarray:
         """
         Sample a factor value for a given year across all Monte Carlo samples
 
@@ -78,34 +185,55 @@ class AIProgressSimulation:
             constraint: Policy/infrastructure constraint (0-1)
             year: Year index (0-based)
             is_energy: If True, use simple growth model (two-phase handled separately)
+            out: Optional array to write the samples into
 
         Returns:
             Array of sampled values for this factor
         """
+        if out is None:
+            out = np.empty(self.samples)
+        growth, year_mean, mean_sq, std_sq, log_mean = self._scratch(5)
+
         # Apply growth with some uncertainty
-        growth_uncertainty = np.random.normal(0, 0.02, self.samples)
-        effective_growth = growth_rate + growth_uncertainty
+        growth_uncertainty = self.rng.normal(0, 0.02, self.samples)
+        np.add(growth_rate, growth_uncertainty, out=growth)
 
         # Calculate mean value for this year
-        year_mean = mean * ((1 + effective_growth) ** year)
-        year_std = std * ((1 + effective_growth) ** year)
+        np.add(1, growth, out=growth)
+        growth **= year  # Not np.power: ** squares exactly when year == 2
+        np.multiply(mean, growth, out=year_mean)
+        np.multiply(std, growth, out=std_sq)  # year_std
 
         # Sample from log-normal distribution (realistic for economic/tech factors)
-        log_mean = np.log(year_mean ** 2 / np.sqrt(year_mean ** 2 + year_std ** 2))
-        log_std = np.sqrt(np.log(1 + year_std ** 2 / year_mean ** 2))
-
-        samples = np.random.lognormal(log_mean, log_std, self.samples)
+        # log_mean = log(year_mean^2 / sqrt(year_mean^2 + year_std^2))
+        np.square(year_mean, out=mean_sq)
+        np.square(std_sq, out=std_sq)
+        np.add(mean_sq, std_sq, out=log_mean)
+        np.sqrt(log_mean, out=log_mean)
+        np.divide(mean_sq, log_mean, out=log_mean)
+        np.log(log_mean, out=log_mean)
+        # log_std = sqrt(log(1 + year_std^2 / year_mean^2))
+        log_std = std_sq
+        np.divide(std_sq, mean_sq, out=log_std)
+        np.add(1, log_std, out=log_std)
+        np.log(log_std, out=log_std)
+        np.sqrt(log_std, out=log_std)
+
+        samples = self.rng.lognormal(log_mean, log_std, self.samples)
 
         # Apply constraint (e.g., export controls, energy limits)
         # Constraint reduces the maximum achievable value
-        max_theoretical = year_mean * 3  # Optimistic upper bound
-        max_constrained = max_theoretical * constraint
-        samples = np.minimum(samples, max_constrained)
+        max_constrained = year_mean
+        np.multiply(year_mean, 3, out=max_constrained)  # Optimistic upper bound
+        np.multiply(max_constrained, constraint, out=max_constrained)
+        np.minimum(samples, max_constrained, out=out)
 
-        return samples
+        return out
 
     def _calculate_energy_for_year(self, params: CountryParams, year: int,
-                                   compute: np.ndarray, initial_twh_per_compute: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+                                   compute: np.ndarray, initial_twh_per_compute: float,
+                                   out: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] = None
+                                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
         Calculate energy metrics for a given year using the new energy model:
         1. Total grid energy grows at a steady rate
@@ -118,16 +246,23 @@ class AIProgressSimulation:
             year: Year index (0-based)
             compute: Compute capacity for this year (millions of GPUs)
             initial_twh_per_compute: TWh per million GPUs in year 0
+            out: Optional arrays to write the four returned metrics into
 
         Returns:
             Tuple of (total_grid_energy, energy_available, energy_required, energy_actual)
         """
+        if out is None:
+            out = tuple(np.empty(self.samples) for _ in range(4))
+        total_grid_energy, energy_available, energy_required, energy_actual = out
+
         # 1. Calculate total grid energy for this year
-        grid_growth = np.random.normal(params.grid_growth_rate, 0.005, self.samples)
-        total_grid_energy = params.total_grid_energy * ((1 + grid_growth) ** year)
+        grid_growth = self.rng.normal(params.grid_growth_rate, 0.005, self.samples)
+        np.add(1, grid_growth, out=total_grid_energy)
+        total_grid_energy **= year  # Same rounding as ** (see _sample_factor)
+        np.multiply(params.total_grid_energy, total_grid_energy, out=total_grid_energy)
 
         # 2. Calculate energy available (grid saturation threshold)
-        energy_available = total_grid_energy * params.grid_saturation_threshold
+        np.multiply(total_grid_energy, params.grid_saturation_threshold, out=energy_available)
 
         # 3. Calculate TWh/Compute ratio for this year (with efficiency improvements)
         # Negative efficiency_improvement_rate means getting more efficient (lower TWh per compute)
@@ -135,45 +270,55 @@ class AIProgressSimulation:
         twh_per_compute_current = initial_twh_per_compute * efficiency_factor
 
         # 4. Calculate energy required based on compute demand
-        energy_required = compute * twh_per_compute_current
+        np.multiply(compute, twh_per_compute_current, out=energy_required)
 
         # 5. Calculate actual energy used (capped by available)
-        energy_actual = np.minimum(energy_required, energy_available)
+        np.minimum(energy_required, energy_available, out=energy_actual)
 
         return total_grid_energy, energy_available, energy_required, energy_actual
 
     def _calculate_progress(self, compute: np.ndarray, capital: np.ndarray,
                            talent: np.ndarray, energy: np.ndarray,
-                           previous_progress: np.ndarray) -> np.ndarray:
+                           previous_progress: np.ndarray,
+                           out: np.ndarray = None) -> np.ndarray:
         """
         Calculate frontier AI progress based on the four factors
 
         Progress is measured as a composite index (baseline 100 = current frontier)
         Each factor contributes multiplicatively with diminishing returns
         """
+        if out is None:
+            out = np.empty(self.samples)
+        term, = self._scratch(1)
+
         # Normalize factors relative to baseline (current US levels)
         # This creates an index where 1.0 = current capability
 
         # Apply Cobb-Douglas style production function with weights
         # P = A * (Compute^α) * (Capital^β) * (Talent^γ) * (Energy^δ)
         # where α + β + γ + δ = 1
-
-        progress = (
-            (compute ** self.weights['compute']) *
-            (capital ** self.weights['capital']) *
-            (talent ** self.weights['talent']) *
-            (energy ** self.weights['energy'])
-        )
+        progress = out
+        np.power(compute, self.weights['compute'], out=progress)
+        np.power(capital, self.weights['capital'], out=term)
+        np.multiply(progress, term, out=progress)
+        np.power(talent, self.weights['talent'], out=term)
+        np.multiply(progress, term, out=progress)
+        np.power(energy, self.weights['energy'], out=term)
+        np.multiply(progress, term, out=progress)
 
         # Add path dependency - previous progress matters (learning effects)
         # Progress builds on itself but with diminishing returns
-        cumulative_effect = 1 + 0.1 * np.log1p(previous_progress)
-        progress = progress * cumulative_effect
+        cumulative_effect = term
+        np.log1p(previous_progress, out=cumulative_effect)
+        np.multiply(0.1, cumulative_effect, out=cumulative_effect)
+        np.add(1, cumulative_effect, out=cumulative_effect)
+        np.multiply(progress, cumulative_effect, out=progress)
 
         return progress
 
     def _calculate_training_capacity(self, compute: np.ndarray, energy: np.ndarray,
-                                     is_china: bool = False) -> np.ndarray:
+                                     is_china: bool = False,
+                                     out: np.ndarray = None) -> np.ndarray:
         """
         Calculate annual training compute capacity in YottaFLOPS-years
 
@@ -181,10 +326,15 @@ class AIProgressSimulation:
             compute: Number of H100-equivalent GPUs (in millions)
             energy: Available datacenter energy (in TWh)
             is_china: Whether this is for China (affects utilization rate)
+            out: Optional array to write the capacity into
 
         Returns:
             Training capacity in YottaFLOPS-years (1e24 FLOPS-years)
         """
+        if out is None:
+            out = np.empty(self.samples)
+        energy_required, energy_multiplier = self._scratch(2)
+
         # Constants
         UTILIZATION_RATE = 0.35 if is_china else 0.40  # Lower utilization for China
         FLOPS_PER_CHIP = 1e15  # 1000 TFLOPS effective for H100
@@ -192,35 +342,34 @@ class AIProgressSimulation:
         TRAINING_FRACTION = 0.4  # 40% of datacenter energy goes to training
 
         # Theoretical max from chips (in FLOPS-years)
-        theoretical_capacity = (
-            compute * 1e6 *  # Convert millions to actual number
-            UTILIZATION_RATE *
-            FLOPS_PER_CHIP *
-            SECONDS_PER_YEAR
-        )
+        theoretical_capacity = out
+        np.multiply(compute, 1e6, out=theoretical_capacity)  # Convert millions to actual number
+        np.multiply(theoretical_capacity, UTILIZATION_RATE, out=theoretical_capacity)
+        np.multiply(theoretical_capacity, FLOPS_PER_CHIP, out=theoretical_capacity)
+        np.multiply(theoretical_capacity, SECONDS_PER_YEAR, out=theoretical_capacity)
 
         # Energy required for theoretical max (in TWh)
         # H100 TDP: 350W, running at utilization rate
-        energy_required = (
-            compute * 1e6 *
-            350e-12 *  # 350W in TW
-            UTILIZATION_RATE *
-            8760  # hours per year
-        )
+        np.multiply(compute, 1e6, out=energy_required)
+        np.multiply(energy_required, 350e-12, out=energy_required)  # 350W in TW
+        np.multiply(energy_required, UTILIZATION_RATE, out=energy_required)
+        np.multiply(energy_required, 8760, out=energy_required)  # hours per year
 
         # Energy available for training
-        energy_available = energy * TRAINING_FRACTION
+        np.multiply(energy, TRAINING_FRACTION, out=energy_multiplier)
 
         # Calculate energy constraint multiplier
-        energy_multiplier = np.minimum(1.0, energy_available / energy_required)
+        np.divide(energy_multiplier, energy_required, out=energy_multiplier)
+        np.minimum(1.0, energy_multiplier, out=energy_multiplier)
 
         # Apply energy constraint
-        actual_capacity = theoretical_capacity * energy_multiplier
+        actual_capacity = theoretical_capacity
+        np.multiply(theoretical_capacity, energy_multiplier, out=actual_capacity)
 
         # Convert to YottaFLOPS-years (1e24 FLOPS) for readability
-        capacity_yottaflops = actual_capacity / 1e24
+        np.divide(actual_capacity, 1e24, out=actual_capacity)
 
-        return capacity_yottaflops
+        return actual_capacity
 
     def run_simulation(self) -> Dict[str, np.ndarray]:
         """
@@ -229,64 +378,123 @@ class AIProgressSimulation:
         Returns:
             Dictionary with time series of progress distributions for both countries
         """
+        # Calculate initial TWh/Compute ratios
+        initial_state = SimulationState(
+            years=0,
+            samples=self.samples,
+            us_progress=np.ones(self.samples),
+            china_progress=np.ones(self.samples),
+            rng_state=None,
+            us_initial_twh_per_compute=self.us_params.energy_mean / self.us_params.compute_mean,
+            china_initial_twh_per_compute=self.china_params.energy_mean / self.china_params.compute_mean,
+        )
+        return self._simulate_years(initial_state, self.years)
+
+    def extend_simulation(self, results: Dict[str, np.ndarray], extra_years: int,
+                          state: SimulationState = None) -> Dict[str, np.ndarray]:
+        """
+        Extend a previous run by more years without recomputing earlier ones
+
+        Sampling is year-indexed and progress only depends on the previous
+        year, so continuing from a checkpoint draws exactly what a single
+        longer run would have drawn.
+
+        Args:
+            results: Results of the run being extended
+            extra_years: Number of years to add
+            state: Checkpoint of that run (defaults to this simulation's last run)
+
+        Returns:
+            Results covering all years of the extended run
+        """
+        state = state or self.state
+        if state is None:
+            raise ValueError('No simulation state to extend; run the simulation first')
+        if state.samples != self.samples:
+            raise ValueError('Simulation state has a different number of samples')
+
+        self.rng.set_state(state.rng_state)
+        extension = self._simulate_years(state, extra_years)
+        self.years = state.years + extra_years
+
+        return {key: np.concatenate([results[key], extension[key]]) for key in results}
+
+    def _result_buffers(self, years: int) -> Dict[str, np.ndarray]:
+        """Result arrays for `years` years (from the workspace if one is set)"""
+        if self.workspace is not None:
+            return self.workspace.results(years)
+        return {key: np.zeros((years, self.samples)) for key in RESULT_KEYS}
+
+    def _simulate_years(self, state: SimulationState, years: int) -> Dict[str, np.ndarray]:
+        """
+        Simulate `years` years following the checkpoint in `state`
+
+        Sets self.state to the checkpoint at the end of the simulated years.
+        """
         # Initialize results arrays
-        us_progress = np.zeros((self.years, self.samples))
-        china_progress = np.zeros((self.years, self.samples))
+        results = self._result_buffers(years)
+
+        us_progress = results['us_progress']
+        china_progress = results['china_progress']
 
-        us_training_capacity = np.zeros((self.years, self.samples))
-        china_training_capacity = np.zeros((self.years, self.samples))
+        us_training_capacity = results['us_training_capacity']
+        china_training_capacity = results['china_training_capacity']
 
-        us_compute_ts = np.zeros((self.years, self.samples))
-        us_capital_ts = np.zeros((self.years, self.samples))
-        us_talent_ts = np.zeros((self.years, self.samples))
-        us_energy_ts = np.zeros((self.years, self.samples))
+        us_compute_ts = results['us_compute']
+        us_capital_ts = results['us_capital']
+        us_talent_ts = results['us_talent']
+        us_energy_ts = results['us_energy']
 
-        china_compute_ts = np.zeros((self.years, self.samples))
-        china_capital_ts = np.zeros((self.years, self.samples))
-        china_talent_ts = np.zeros((self.years, self.samples))
-        china_energy_ts = np.zeros((self.years, self.samples))
+        china_compute_ts = results['china_compute']
+        china_capital_ts = results['china_capital']
+        china_talent_ts = results['china_talent']
+        china_energy_ts = results['china_energy']
 
         # New energy model tracking
-        us_total_grid = np.zeros((self.years, self.samples))
-        us_energy_available = np.zeros((self.years, self.samples))
-        us_energy_required = np.zeros((self.years, self.samples))
+        us_total_grid = results['us_total_grid']
+        us_energy_available = results['us_energy_available']
+        us_energy_required = results['us_energy_required']
 
-        china_total_grid = np.zeros((self.years, self.samples))
-        china_energy_available = np.zeros((self.years, self.samples))
-        china_energy_required = np.zeros((self.years, self.samples))
+        china_total_grid = results['china_total_grid']
+        china_energy_available = results['china_energy_available']
+        china_energy_required = results['china_energy_required']
 
-        # Calculate initial TWh/Compute ratios
-        us_initial_twh_per_compute = self.us_params.energy_mean / self.us_params.compute_mean
-        china_initial_twh_per_compute = self.china_params.energy_mean / self.china_params.compute_mean
+        us_initial_twh_per_compute = state.us_initial_twh_per_compute
+        china_initial_twh_per_compute = state.china_initial_twh_per_compute
 
-        # Run simulation year by year
-        for year in range(self.years):
+        # Run simulation year by year (`year` is absolute, `i` indexes the results).
+        # Every factor is computed directly into its row of the results arrays.
+        for i, year in enumerate(range(state.years, state.years + years)):
             # Sample US factors
             us_compute = self._sample_factor(
                 self.us_params.compute_mean,
                 self.us_params.compute_std,
                 self.us_params.compute_growth_rate,
                 self.us_params.compute_constraint,
-                year
+                year,
+                out=us_compute_ts[i]
             )
             us_capital = self._sample_factor(
                 self.us_params.capital_mean,
                 self.us_params.capital_std,
                 self.us_params.capital_growth_rate,
                 self.us_params.capital_constraint,
-                year
+                year,
+                out=us_capital_ts[i]
             )
             us_talent = self._sample_factor(
                 self.us_params.talent_mean,
                 self.us_params.talent_std,
                 self.us_params.talent_growth_rate,
                 self.us_params.talent_constraint,
-                year
+                year,
+                out=us_talent_ts[i]
             )
 
             # Calculate US energy using new model
-            us_grid, us_avail, us_req, us_energy = self._calculate_energy_for_year(
-                self.us_params, year, us_compute, us_initial_twh_per_compute
+            _, _, _, us_energy = self._calculate_energy_for_year(
+                self.us_params, year, us_compute, us_initial_twh_per_compute,
+                out=(us_total_grid[i], us_energy_available[i], us_energy_required[i], us_energy_ts[i])
             )
 
             # Sample China factors
@@ -295,88 +503,66 @@ class AIProgressSimulation:
                 self.china_params.compute_std,
                 self.china_params.compute_growth_rate,
                 self.china_params.compute_constraint,
-                year
+                year,
+                out=china_compute_ts[i]
             )
             china_capital = self._sample_factor(
                 self.china_params.capital_mean,
                 self.china_params.capital_std,
                 self.china_params.capital_growth_rate,
                 self.china_params.capital_constraint,
-                year
+                year,
+                out=china_capital_ts[i]
             )
             china_talent = self._sample_factor(
                 self.china_params.talent_mean,
                 self.china_params.talent_std,
                 self.china_params.talent_growth_rate,
                 self.china_params.talent_constraint,
-                year
+                year,
+                out=china_talent_ts[i]
             )
 
             # Calculate China energy using new model
-            china_grid, china_avail, china_req, china_energy = self._calculate_energy_for_year(
-                self.china_params, year, china_compute, china_initial_twh_per_compute
+            _, _, _, china_energy = self._calculate_energy_for_year(
+                self.china_params, year, china_compute, china_initial_twh_per_compute,
+                out=(china_total_grid[i], china_energy_available[i], china_energy_required[i],
+                     china_energy_ts[i])
             )
 
-            # Store factor values
-            us_compute_ts[year] = us_compute
-            us_capital_ts[year] = us_capital
-            us_talent_ts[year] = us_talent
-            us_energy_ts[year] = us_energy
-
-            china_compute_ts[year] = china_compute
-            china_capital_ts[year] = china_capital
-            china_talent_ts[year] = china_talent
-            china_energy_ts[year] = china_energy
-
-            # Store energy model metrics
-            us_total_grid[year] = us_grid
-            us_energy_available[year] = us_avail
-            us_energy_required[year] = us_req
-
-            china_total_grid[year] = china_grid
-            china_energy_available[year] = china_avail
-            china_energy_required[year] = china_req
-
             # Calculate progress
-            prev_us = us_progress[year-1] if year > 0 else np.ones(self.samples)
-            prev_china = china_progress[year-1] if year > 0 else np.ones(self.samples)
+            prev_us = us_progress[i-1] if i > 0 else state.us_progress
+            prev_china = china_progress[i-1] if i > 0 else state.china_progress
 
-            us_progress[year] = self._calculate_progress(
-                us_compute, us_capital, us_talent, us_energy, prev_us
+            self._calculate_progress(
+                us_compute, us_capital, us_talent, us_energy, prev_us,
+                out=us_progress[i]
             )
-            china_progress[year] = self._calculate_progress(
-                china_compute, china_capital, china_talent, china_energy, prev_china
+            self._calculate_progress(
+                china_compute, china_capital, china_talent, china_energy, prev_china,
+                out=china_progress[i]
             )
 
             # Calculate training capacity
-            us_training_capacity[year] = self._calculate_training_capacity(
-                us_compute, us_energy, is_china=False
+            self._calculate_training_capacity(
+                us_compute, us_energy, is_china=False, out=us_training_capacity[i]
             )
-            china_training_capacity[year] = self._calculate_training_capacity(
-                china_compute, china_energy, is_china=True
+            self._calculate_training_capacity(
+                china_compute, china_energy, is_china=True, out=china_training_capacity[i]
             )
 
-        return {
-            'us_progress': us_progress,
-            'china_progress': china_progress,
-            'us_training_capacity': us_training_capacity,
-            'china_training_capacity': china_training_capacity,
-            'us_compute': us_compute_ts,
-            'us_capital': us_capital_ts,
-            'us_talent': us_talent_ts,
-            'us_energy': us_energy_ts,
-            'china_compute': china_compute_ts,
-            'china_capital': china_capital_ts,
-            'china_talent': china_talent_ts,
-            'china_energy': china_energy_ts,
-            # New energy model metrics
-            'us_total_grid': us_total_grid,
-            'us_energy_available': us_energy_available,
-            'us_energy_required': us_energy_required,
-            'china_total_grid': china_total_grid,
-            'china_energy_available': china_energy_available,
-            'china_energy_required': china_energy_required,
-        }
+        # Copy the last year's progress so the checkpoint survives workspace reuse
+        self.state = SimulationState(
+            years=state.years + years,
+            samples=self.samples,
+            us_progress=us_progress[-1].copy() if years > 0 else state.us_progress,
+            china_progress=china_progress[-1].copy() if years > 0 else state.china_progress,
+            rng_state=self.rng.get_state(),
+            us_initial_twh_per_compute=us_initial_twh_per_compute,
+            china_initial_twh_per_compute=china_initial_twh_per_compute,
+        )
+
+        return results
 
     def get_summary_statistics(self, results: Dict[str, np.ndarray]) -> Dict:
         """Calculate summary statistics from simulation results"""
@@ -385,17 +571,259 @@ class AIProgressSimulation:
         for key, data in results.items():
             # Calculate percentiles for each year
             percentiles = {
-                'p10': np.percentile(data, 10, axis=1).tolist(),
-                'p25': np.percentile(data, 25, axis=1).tolist(),
-                'p50': np.percentile(data, 50, axis=1).tolist(),
-                'p75': np.percentile(data, 75, axis=1).tolist(),
-                'p90': np.percentile(data, 90, axis=1).tolist(),
-                'mean': np.mean(data, axis=1).tolist(),
+                name: np.percentile(data, q, axis=1).tolist()
+                for name, q in PERCENTILES.items()
             }
+            percentiles['mean'] = np.mean(data, axis=1).tolist()
             stats[key] = percentiles
 
         return stats
 
+    def get_outcome_metrics(self, results: Dict[str, np.ndarray]) -> Dict[str, float]:
+        """Calculate headline catch-up metrics from the final simulated year"""
+        final_year_us = results['us_progress'][-1]
+        final_year_china = results['china_progress'][-1]
+
+        return {
+            # Probability that China catches up (gets within 90% of US progress)
+            'catchup_probability': float(np.mean(final_year_china >= 0.9 * final_year_us)),
+            # Probability that China surpasses US
+            'surpass_probability': float(np.mean(final_year_china >= final_year_us)),
+            'us_final_median': float(np.median(final_year_us)),
+            'china_final_median': float(np.median(final_year_china)),
+        }
+
+    def get_confidence_intervals(self, results: Dict[str, np.ndarray], level: float = 0.90,
+                                 method: str = 'analytic', replicates: int = 200,
+                                 seed: int = None, keys: List[str] = None) -> Dict:
+        """
+        Monte Carlo confidence intervals for the summary statistics and metrics
+
+        With method='analytic', percentile bands use distribution-free
+        order-statistic intervals and means use the normal approximation,
+        all read off one sort of each series. With method='bootstrap', a
+        Poisson bootstrap reweights the samples with independent Poisson(1)
+        counts and evaluates every replicate at once; the same weights are
+        used for every series, so US and China stay paired. Catch-up and
+        surpass probabilities always use analytic Wilson score intervals.
+
+        Args:
+            results: Results from run_simulation
+            level: Confidence level (e.g., 0.90 for 90% intervals)
+            method: 'analytic' or 'bootstrap'
+            replicates: Number of bootstrap replicates
+            seed: Seed for the bootstrap weights (does not touch np.random)
+            keys: Result series to cover (defaults to all; PROGRESS_KEYS are
+                  always included)
+
+        Returns:
+            Dictionary with 'stats' ({key: {stat: {'lower': [...], 'upper': [...]}}})
+            shaped like get_summary_statistics, and 'metrics' ({name: [lower, upper]})
+
+        Raises:
+            ValueError: If level is not strictly between 0 and 1, there are
+                        fewer than 2 samples, replicates is less than 1, a key
+                        is not in results, or method is unknown
+        """
+        if not 0 < level < 1:
+            raise ValueError(f"Confidence level must be between 0 and 1 (exclusive), got {level}")
+        if self.samples < 2:
+            raise ValueError(f"Confidence intervals need at least 2 samples, got {self.samples}")
+        if method == 'bootstrap' and replicates < 1:
+            raise ValueError(f"Bootstrap replicates must be at least 1, got {replicates}")
+
+        keys = list(dict.fromkeys(list(results if keys is None else keys) + PROGRESS_KEYS))
+        unknown = [key for key in keys if key not in results]
+        if unknown:
+            raise ValueError(f"Unknown result keys: {', '.join(map(str, unknown))}")
+        series = {key: results[key] for key in keys}
+
+        if method == 'analytic':
+            intervals = {key: _analytic_intervals(data, level) for key, data in series.items()}
+        elif method == 'bootstrap':
+            weights = np.random.default_rng(seed).poisson(1.0, (replicates, self.samples))
+            tail = (1 - level) / 2
+            intervals = {}
+            for key, data in series.items():
+                replicated = _bootstrap_statistics(data, weights)
+                bounds = np.quantile(np.stack(list(replicated.values())), [tail, 1 - tail], axis=1)
+                intervals[key] = dict(zip(replicated, zip(bounds[0], bounds[1])))
+        else:
+            raise ValueError(f"Unknown confidence interval method: {method}")
+
+        stats = {
+            key: {name: {'lower': lower.tolist(), 'upper': upper.tolist()}
+                  for name, (lower, upper) in bounds.items()}
+            for key, bounds in intervals.items()
+        }
+
+        final_year_us = results['us_progress'][-1]
+        final_year_china = results['china_progress'][-1]
+        n = len(final_year_us)
+
+        metrics = {
+            'catchup_probability': _wilson_interval(
+                np.sum(final_year_china >= 0.9 * final_year_us), n, level),
+            'surpass_probability': _wilson_interval(
+                np.sum(final_year_china >= final_year_us), n, level),
+            'us_final_median': [stats['us_progress']['p50']['lower'][-1],
+                                stats['us_progress']['p50']['upper'][-1]],
+            'china_final_median': [stats['china_progress']['p50']['lower'][-1],
+                                   stats['china_progress']['p50']['upper'][-1]],
+        }
+
+        return {'level': level, 'method': method, 'stats': stats, 'metrics': metrics}
+
+
+def _analytic_intervals(data: np.ndarray, level: float) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Analytic confidence intervals for the summary statistics of each year
+
+    The interval for the q-th percentile is between the order statistics at
+    ranks n*q -/+ z*sqrt(n*q*(1-q)) (normal approximation to the binomial
+    count of samples below the true percentile).
+
+    Args:
+        data: (years, samples) array of simulated values
+        level: Confidence level
+
+    Returns:
+        Dictionary of (lower, upper) per-year arrays keyed like get_summary_statistics
+    """
+    samples = data.shape[1]
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    sorted_data = np.sort(data, axis=1)
+
+    intervals = {}
+    for name, q in PERCENTILES.items():
+        q /= 100
+        half_width = z * np.sqrt(samples * q * (1 - q))
+        lower_rank = int(np.clip(np.floor(samples * q - half_width), 1, samples))
+        upper_rank = int(np.clip(np.ceil(samples * q + half_width), 1, samples))
+        intervals[name] = (sorted_data[:, lower_rank - 1], sorted_data[:, upper_rank - 1])
+
+    mean = data.mean(axis=1)
+    standard_error = data.std(axis=1, ddof=1) / np.sqrt(samples)
+    intervals['mean'] = (mean - z * standard_error, mean + z * standard_error)
+
+    return intervals
+
+
+def _bootstrap_statistics(data: np.ndarray, weights: np.ndarray,
+                          max_elements: int = 2**22) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the summary statistics of every bootstrap replicate at once
+
+    Replicate percentiles are lower empirical quantiles of the weighted
+    samples (the smallest value whose cumulative count reaches q% of the
+    replicate's total, numpy's 'inverted_cdf'), whereas get_summary_statistics
+    interpolates linearly with np.percentile. The difference is within one
+    order statistic, small next to the sampling spread being estimated.
+
+    Args:
+        data: (years, samples) array of simulated values
+        weights: (replicates, samples) integer bootstrap counts
+        max_elements: Size of the (replicates, years, samples) working arrays;
+                      years are processed in chunks to stay within it
+
+    Returns:
+        Dictionary of (replicates, years) arrays keyed like get_summary_statistics
+    """
+    replicates, samples = weights.shape
+    years = data.shape[0]
+    totals = weights.sum(axis=1)
+
+    # Weighted means need no sorting
+    replicated = {name: np.empty((replicates, years)) for name in PERCENTILES}
+    replicated['mean'] = (weights @ data.T) / np.maximum(totals, 1)[:, None]
+
+    # Weighted percentiles: sort each year once, then find where every
+    # replicate's cumulative count first reaches each percentile of its total.
+    # Offsetting each (replicate, year) row by more than any total makes the
+    # flattened cumulative counts one increasing sequence, so a single
+    # searchsorted handles all rows and percentiles.
+    order = np.argsort(data, axis=1)
+    sorted_data = np.take_along_axis(data, order, axis=1)
+    fractions = np.array(list(PERCENTILES.values())) / 100
+    thresholds = np.maximum(np.ceil(totals[:, None] * fractions), 1).astype(np.int64)
+    stride = int(totals.max()) + 1
+    chunk = max(1, max_elements // (replicates * samples))
+
+    for start in range(0, years, chunk):
+        stop = min(start + chunk, years)
+        rows = replicates * (stop - start)
+        offsets = stride * np.arange(rows, dtype=np.int64)[:, None]
+
+        cumulative = np.cumsum(weights[:, order[start:stop]], axis=2, dtype=np.int64)
+        cumulative = cumulative.reshape(rows, samples) + offsets
+
+        row_thresholds = thresholds.repeat(stop - start, axis=0) + offsets
+        positions = np.searchsorted(cumulative.ravel(), row_thresholds.ravel())
+        positions = positions.reshape(rows, len(fractions)) - np.arange(rows)[:, None] * samples
+        np.minimum(positions, samples - 1, out=positions)
+
+        year_index = np.tile(np.arange(start, stop), replicates)[:, None]
+        values = sorted_data[year_index, positions].reshape(replicates, stop - start, len(fractions))
+        for i, name in enumerate(PERCENTILES):
+            replicated[name][:, start:stop] = values[:, :, i]
+
+    return replicated
+
+
+def _wilson_interval(successes: int, trials: int, level: float) -> List[float]:
+    """Wilson score interval for a binomial proportion"""
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    p = successes / trials
+    denominator = 1 + z ** 2 / trials
+    centre = (p + z ** 2 / (2 * trials)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    return [float(max(0.0, centre - half_width)), float(min(1.0, centre + half_width))]
+
+
+# Relative uncertainty (std / mean) applied to the means supplied by the UI
+US_RELATIVE_STD = {'compute': 0.12, 'capital': 0.14, 'talent': 0.08, 'energy': 0.11}
+CHINA_RELATIVE_STD = {'compute': 0.25, 'capital': 0.20, 'talent': 0.12, 'energy': 0.14}
+
+
+def build_country_params(values: Dict, is_china: bool = False) -> CountryParams:
+    """
+    Build CountryParams from the flat parameter dictionary used by the web UI
+
+    Args:
+        values: Slider values for one country (compute_mean, compute_growth_rate, ...)
+        is_china: Whether these are China's parameters (affects uncertainty)
+
+    Returns:
+        CountryParams with standard deviations derived from the means
+    """
+    relative_std = CHINA_RELATIVE_STD if is_china else US_RELATIVE_STD
+
+    return CountryParams(
+        compute_mean=float(values['compute_mean']),
+        compute_std=float(values['compute_mean']) * relative_std['compute'],
+        compute_growth_rate=float(values['compute_growth_rate']),
+        compute_constraint=float(values['compute_constraint']),
+
+        capital_mean=float(values['capital_mean']),
+        capital_std=float(values['capital_mean']) * relative_std['capital'],
+        capital_growth_rate=float(values['capital_growth_rate']),
+        capital_constraint=float(values['capital_constraint']),
+
+        talent_mean=float(values['talent_mean']),
+        talent_std=float(values['talent_mean']) * relative_std['talent'],
+        talent_growth_rate=float(values['talent_growth_rate']),
+        talent_constraint=float(values['talent_constraint']),
+
+        energy_mean=float(values['energy_mean']),
+        energy_std=float(values['energy_mean']) * relative_std['energy'],
+        energy_constraint=0.70 if is_china else 0.80,  # Deprecated parameter, kept for compatibility
+        # New energy model parameters
+        total_grid_energy=float(values['total_grid_energy']),
+        grid_growth_rate=float(values['grid_growth_rate']),
+        efficiency_improvement_rate=float(values['efficiency_improvement_rate']),
+        grid_saturation_threshold=float(values['grid_saturation_threshold']),
+    )
+
 
 def get_default_us_params() -> CountryParams:
     """
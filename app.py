@@ -3,16 +3,23 @@ Flask web application for AI Policy Simulation
 """
 
 from flask import Flask, render_template, request, jsonify
-import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
 import markdown
 import os
+import queue
+import threading
 import yaml
 from ai_policy_simulation import (
     AIProgressSimulation,
-    CountryParams,
+    PROGRESS_KEYS,
+    SimulationWorkspace,
+    build_country_params,
     get_default_us_params,
     get_default_china_params
 )
+from emulator import SimulationEmulator
+from simulation_cache import SimulationCache, SharedSimulationCache
 
 # Load configuration
 def load_config():
@@ -26,15 +33,90 @@ def load_config():
         return {
             'app': {'version': '1.0.0'},
             'server': {'port': 5000, 'host': '127.0.0.1', 'debug': True},
-            'simulation': {'default_years': 10, 'default_samples': 1000, 'max_samples': 5000}
+            'simulation': {'default_years': 10, 'default_samples': 1000, 'max_samples': 5000,
+                           'max_years': 100}
         }
 
 config = load_config()
 
-app = Flask(__name__)
 
-# Set random seed for reproducibility in development
-np.random.seed(42)
+def load_emulator():
+    """Load the surrogate emulator built by emulator.py, if present"""
+    try:
+        return SimulationEmulator.load()
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError) as e:
+        print(f"Error loading emulator: {e}")
+        return None
+
+emulator = load_emulator()
+
+
+
+def create_simulation_cache():
+    """Create the run cache, shared between worker processes if configured"""
+    sim_config = config['simulation']
+    max_entries = sim_config.get('cache_size', 32)
+    max_bytes = int(sim_config.get('cache_mb', 256) * 2**20)
+
+    if sim_config.get('shared_cache', False):
+        try:
+            return SharedSimulationCache(
+                path=sim_config.get('shared_cache_path'),
+                slots=sim_config.get('shared_cache_slots', 64),
+                slot_size=int(sim_config.get('shared_cache_slot_mb', 4) * 2**20),
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+            )
+        except OSError as e:
+            print(f"Error opening shared simulation cache: {e}")
+
+    return SimulationCache(max_entries, max_bytes)
+
+# Completed runs, reused when the same scenario is requested with any horizon
+simulation_cache = create_simulation_cache()
+
+# Simulation scratch buffers shared by all request threads, so repeated
+# requests of the same shape allocate no temporaries (see SimulationWorkspace).
+# Each run's result buffers are handed over to the cache, so a cache miss
+# still allocates its results. The built-in server starts a thread per
+# request, so buffers are checked out of a process-wide pool rather than
+# kept per thread.
+_workspace_pool: 'OrderedDict[int, queue.SimpleQueue]' = OrderedDict()
+_workspace_pool_lock = threading.Lock()
+MAX_WORKSPACE_SHAPES = 4  # Sample counts with idle workspaces kept
+MAX_IDLE_WORKSPACES = 4  # Idle workspaces kept per sample count
+
+
+@contextmanager
+def checkout_workspace(samples: int):
+    """Borrow a workspace for runs with `samples` samples, returning it afterwards"""
+    with _workspace_pool_lock:
+        idle = _workspace_pool.get(samples)
+        if idle is None:
+            idle = _workspace_pool[samples] = queue.SimpleQueue()
+            if len(_workspace_pool) > MAX_WORKSPACE_SHAPES:
+                # Drop the least recently used shape
+                _workspace_pool.popitem(last=False)
+        _workspace_pool.move_to_end(samples)
+
+    try:
+        workspace = idle.get_nowait()
+    except queue.Empty:
+        workspace = SimulationWorkspace(samples)
+
+    try:
+        yield workspace
+    finally:
+        if idle.qsize() < MAX_IDLE_WORKSPACES:
+            idle.put(workspace)
+
+# Series the UI charts, covered by confidence intervals unless the request
+# names others in confidence_keys
+CONFIDENCE_KEYS = PROGRESS_KEYS + ['us_training_capacity', 'china_training_capacity']
+
+app = Flask(__name__)
 
 
 @app.route('/')
@@ -119,92 +201,79 @@ def simulate():
     """Run simulation with provided parameters"""
     data = request.json
 
-    # Parse US parameters with new energy model
-    us_params = CountryParams(
-        compute_mean=float(data['us']['compute_mean']),
-        compute_std=float(data['us']['compute_mean']) * 0.12,  # 12% std dev
-        compute_growth_rate=float(data['us']['compute_growth_rate']),
-        compute_constraint=float(data['us']['compute_constraint']),
-
-        capital_mean=float(data['us']['capital_mean']),
-        capital_std=float(data['us']['capital_mean']) * 0.14,  # 14% std dev
-        capital_growth_rate=float(data['us']['capital_growth_rate']),
-        capital_constraint=float(data['us']['capital_constraint']),
-
-        talent_mean=float(data['us']['talent_mean']),
-        talent_std=float(data['us']['talent_mean']) * 0.08,  # 8% std dev
-        talent_growth_rate=float(data['us']['talent_growth_rate']),
-        talent_constraint=float(data['us']['talent_constraint']),
-
-        energy_mean=float(data['us']['energy_mean']),
-        energy_std=float(data['us']['energy_mean']) * 0.11,  # 11% std dev
-        energy_constraint=0.80,  # Deprecated parameter, kept for compatibility
-        # New energy model parameters
-        total_grid_energy=float(data['us']['total_grid_energy']),
-        grid_growth_rate=float(data['us']['grid_growth_rate']),
-        efficiency_improvement_rate=float(data['us']['efficiency_improvement_rate']),
-        grid_saturation_threshold=float(data['us']['grid_saturation_threshold']),
-    )
+    us_params = build_country_params(data['us'])
+    china_params = build_country_params(data['china'], is_china=True)
 
-    # Parse China parameters with new energy model
-    china_params = CountryParams(
-        compute_mean=float(data['china']['compute_mean']),
-        compute_std=float(data['china']['compute_mean']) * 0.25,  # Higher uncertainty
-        compute_growth_rate=float(data['china']['compute_growth_rate']),
-        compute_constraint=float(data['china']['compute_constraint']),
-
-        capital_mean=float(data['china']['capital_mean']),
-        capital_std=float(data['china']['capital_mean']) * 0.20,
-        capital_growth_rate=float(data['china']['capital_growth_rate']),
-        capital_constraint=float(data['china']['capital_constraint']),
-
-        talent_mean=float(data['china']['talent_mean']),
-        talent_std=float(data['china']['talent_mean']) * 0.12,
-        talent_growth_rate=float(data['china']['talent_growth_rate']),
-        talent_constraint=float(data['china']['talent_constraint']),
-
-        energy_mean=float(data['china']['energy_mean']),
-        energy_std=float(data['china']['energy_mean']) * 0.14,
-        energy_constraint=0.70,  # Deprecated parameter, kept for compatibility
-        # New energy model parameters
-        total_grid_energy=float(data['china']['total_grid_energy']),
-        grid_growth_rate=float(data['china']['grid_growth_rate']),
-        efficiency_improvement_rate=float(data['china']['efficiency_improvement_rate']),
-        grid_saturation_threshold=float(data['china']['grid_saturation_threshold']),
-    )
-
-    # Get simulation parameters
-    years = int(data.get('years', 10))
-    samples = int(data.get('samples', 200))
-
-    # Use different random seed for each simulation
-    np.random.seed()
-
-    # Run simulation
-    sim = AIProgressSimulation(us_params, china_params, years=years, samples=samples)
-    results = sim.run_simulation()
-    stats = sim.get_summary_statistics(results)
-
-    # Calculate additional metrics
-    final_year_us = results['us_progress'][-1]
-    final_year_china = results['china_progress'][-1]
-
-    # Probability that China catches up (gets within 90% of US progress)
-    catchup_probability = np.mean(final_year_china >= 0.9 * final_year_us)
-
-    # Probability that China surpasses US
-    surpass_probability = np.mean(final_year_china >= final_year_us)
-
-    return jsonify({
+    # Get simulation parameters, bounded before any buffers are allocated for them
+    try:
+        years = int(data.get('years', 10))
+        samples = int(data.get('samples', 200))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Years and samples must be integers'}), 400
+
+    max_years = config['simulation'].get('max_years', 100)
+    max_samples = config['simulation']['max_samples']
+    if not 1 <= years <= max_years:
+        return jsonify({'error': f"Years must be between 1 and {max_years}, got {years}"}), 400
+    if not 1 <= samples <= max_samples:
+        return jsonify({'error': f"Samples must be between 1 and {max_samples}, got {samples}"}), 400
+
+    # Run simulation (each new scenario is seeded independently), reusing the
+    # years already simulated for this scenario. The cache takes the results
+    # out of the workspace, so it can go straight back to the pool.
+    with checkout_workspace(samples) as workspace:
+        sim = AIProgressSimulation(us_params, china_params, years=years, samples=samples,
+                                   workspace=workspace)
+        results, stats = simulation_cache.run(sim)
+
+    response = {
         'stats': stats,
         'years': years,
-        'metrics': {
-            'catchup_probability': float(catchup_probability),
-            'surpass_probability': float(surpass_probability),
-            'us_final_median': float(np.median(final_year_us)),
-            'china_final_median': float(np.median(final_year_china)),
-        }
-    })
+        'metrics': sim.get_outcome_metrics(results)
+    }
+
+    # Optional Monte Carlo error for the charted statistics
+    if data.get('confidence_intervals', False):
+        try:
+            method = data.get('confidence_method', 'analytic')
+            keys = list(dict.fromkeys(list(data.get('confidence_keys', CONFIDENCE_KEYS)) + PROGRESS_KEYS))
+
+            # Bootstrap weights take replicates x samples memory, so cap them
+            replicates = int(data.get('bootstrap_replicates', 200))
+            max_replicates = config['simulation'].get('max_bootstrap_replicates', 1000)
+            if replicates > max_replicates:
+                raise ValueError(f"Bootstrap replicates must be at most {max_replicates}, got {replicates}")
+
+            # Bootstrap time grows with replicates x samples x years x series
+            elements = replicates * samples * years * len(keys)
+            max_elements = config['simulation'].get('max_bootstrap_elements', 100_000_000)
+            if method == 'bootstrap' and elements > max_elements:
+                raise ValueError(f"Bootstrap work (replicates x samples x years x series) must be at most "
+                                 f"{max_elements}, got {elements}; request fewer replicates or series")
+
+            response['confidence_intervals'] = sim.get_confidence_intervals(
+                results,
+                level=float(data.get('confidence_level', 0.90)),
+                method=method,
+                replicates=replicates,
+                keys=keys,
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+    return jsonify(response)
+
+
+@app.route('/api/emulate', methods=['POST'])
+def emulate():
+    """Predict simulation results instantly from the surrogate emulator"""
+    if emulator is None:
+        return jsonify({'error': 'Emulator not found. Run python emulator.py to build it'}), 404
+
+    try:
+        return jsonify(emulator.predict(request.json))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @app.route('/api/research-report')
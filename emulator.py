@@ -0,0 +1,392 @@
+"""
+Surrogate emulator for the AI Policy Simulation
+
+Runs a space-filling batch of AIProgressSimulation scenarios over the UI's
+slider ranges and fits a quadratic response surface to the percentile
+trajectories and catch-up metrics. Predictions take microseconds, so the UI
+can preview results while a slider is being dragged and run the real
+simulation once it is released.
+
+Usage:
+    python emulator.py --runs 1500 --samples 200
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from ai_policy_simulation import AIProgressSimulation, SimulationWorkspace, build_country_params
+
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'emulator_model.json')
+
+# Slider ranges from templates/index.html: (name, min, max, transform)
+# Inputs are mapped through the transform before fitting so that the
+# response is close to quadratic (see _INPUT_TRANSFORMS)
+US_PARAMETER_RANGES = [
+    ('compute_mean', 0.1, 8.0, 'log'),
+    ('compute_growth_rate', 0.0, 1.0, 'linear'),
+    ('compute_constraint', 0.0, 1.0, 'constraint'),
+    ('capital_mean', 20.0, 300.0, 'log'),
+    ('capital_growth_rate', 0.0, 1.0, 'linear'),
+    ('capital_constraint', 0.0, 1.0, 'constraint'),
+    ('talent_mean', 20.0, 150.0, 'log'),
+    ('talent_growth_rate', 0.0, 0.5, 'linear'),
+    ('talent_constraint', 0.0, 1.0, 'constraint'),
+    ('energy_mean', 50.0, 500.0, 'log'),
+    ('total_grid_energy', 3000.0, 12000.0, 'log'),
+    ('grid_growth_rate', 0.0, 0.10, 'linear'),
+    ('efficiency_improvement_rate', -0.15, 0.0, 'linear'),
+    ('grid_saturation_threshold', 0.0, 0.30, 'share'),
+]
+CHINA_PARAMETER_RANGES = [
+    (name, low, 15000.0 if name == 'total_grid_energy' else high, transform)
+    for name, low, high, transform in US_PARAMETER_RANGES
+]
+PARAMETER_RANGES = (
+    [('us',) + r for r in US_PARAMETER_RANGES] +
+    [('china',) + r for r in CHINA_PARAMETER_RANGES]
+)
+
+_INPUT_TRANSFORMS = {
+    'linear': lambda v: v,
+    # Levels enter the Cobb-Douglas production function as powers
+    'log': np.log,
+    # Samples are capped at 3x the year mean times the constraint, so the
+    # constraint only binds below ~1/3 and then acts multiplicatively
+    'constraint': lambda v: np.minimum(0.0, np.log(np.maximum(3 * v, 0.03))),
+    # Grid share caps available energy multiplicatively
+    'share': lambda v: np.log(np.maximum(v, 0.005)),
+}
+
+# Outputs reproduced by the emulator
+EMULATED_KEYS = ['us_progress', 'china_progress']
+PERCENTILE_NAMES = ['p10', 'p25', 'p50', 'p75', 'p90', 'mean']
+METRIC_NAMES = ['catchup_probability', 'surpass_probability']
+
+# Catch-up/surpass probabilities are step-like in the inputs, so instead of
+# fitting them directly the emulator fits the mean and log standard deviation
+# of the final-year log(China / US) progress ratio and treats it as normal
+CATCHUP_THRESHOLD = 0.9
+_RATIO_FLOOR = 1e-6
+
+
+def latin_hypercube(runs: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Latin hypercube design on the unit cube
+
+    Each dimension is split into `runs` equal strata and every stratum is
+    sampled exactly once, giving better coverage than independent uniforms.
+    """
+    strata = np.argsort(rng.random((runs, dims)), axis=0)
+    return (strata + rng.random((runs, dims))) / runs
+
+
+def _flatten_parameters(data: Dict) -> np.ndarray:
+    """Extract the emulator input vector from an /api/simulate payload"""
+    values = []
+    for region, name, _, _, _ in PARAMETER_RANGES:
+        try:
+            values.append(float(data[region][name]))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Missing or invalid parameter {region}.{name}") from None
+    return np.array(values)
+
+
+def _unflatten_parameters(values: np.ndarray) -> Dict:
+    """Inverse of _flatten_parameters"""
+    data = {'us': {}, 'china': {}}
+    for (region, name, _, _, _), value in zip(PARAMETER_RANGES, values):
+        data[region][name] = float(value)
+    return data
+
+
+def _scale_inputs(values: np.ndarray) -> np.ndarray:
+    """Transform raw parameter values onto [-1, 1], clipping to the slider ranges"""
+    values = np.atleast_2d(values)
+    scaled = np.empty(values.shape)
+    for i, (_, _, low, high, transform) in enumerate(PARAMETER_RANGES):
+        f = _INPUT_TRANSFORMS[transform]
+        column = f(np.clip(values[:, i], low, high))
+        scaled[:, i] = 2 * (column - f(low)) / (f(high) - f(low)) - 1
+    return scaled
+
+
+def _quadratic_features(scaled: np.ndarray) -> np.ndarray:
+    """Constant, linear and all second-order interaction terms"""
+    rows, columns = np.triu_indices(scaled.shape[1])
+    return np.hstack([
+        np.ones((scaled.shape[0], 1)),
+        scaled,
+        scaled[:, rows] * scaled[:, columns],
+    ])
+
+
+def _output_names(years: int) -> List[Tuple[str, str, int]]:
+    """Ordered (key, statistic, year) triples for the emulated percentile outputs"""
+    return [
+        (key, stat, year)
+        for key in EMULATED_KEYS
+        for stat in PERCENTILE_NAMES
+        for year in range(years)
+    ]
+
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (numpy has no vectorised erf)"""
+    return 0.5 * (1 + np.vectorize(math.erf)(np.asarray(z) / math.sqrt(2)))
+
+
+def _ratio_probabilities(log_ratio_mean: np.ndarray, log_ratio_log_std: np.ndarray) -> np.ndarray:
+    """Catch-up and surpass probabilities from the emulated log ratio distribution"""
+    std = np.exp(log_ratio_log_std)
+    return np.column_stack([
+        _normal_cdf((log_ratio_mean - np.log(CATCHUP_THRESHOLD)) / std),
+        _normal_cdf(log_ratio_mean / std),
+    ])
+
+
+def _ridge_fit(features: np.ndarray, targets: np.ndarray, ridge: float) -> np.ndarray:
+    """Solve the ridge-regularised least squares problem for all outputs at once"""
+    gram = features.T @ features
+    penalty = ridge * np.eye(gram.shape[0])
+    penalty[0, 0] = 0.0  # Do not shrink the intercept
+    return np.linalg.solve(gram + penalty, features.T @ targets)
+
+
+def run_design(runs: int, years: int = 10, samples: int = 200,
+               seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the simulation over a Latin hypercube design of the UI parameter space
+
+    Args:
+        runs: Number of scenarios in the design
+        years: Years simulated per scenario
+        samples: Monte Carlo samples per scenario
+        seed: Seed for both the design and the simulations
+
+    Returns:
+        Tuple of (raw parameter matrix, percentile outputs ordered as
+        _output_names, final-year log ratio mean and log std, simulated
+        catch-up and surpass probabilities)
+    """
+    rng = np.random.default_rng(seed)
+    unit = latin_hypercube(runs, len(PARAMETER_RANGES), rng)
+
+    inputs = np.empty_like(unit)
+    for i, (_, _, low, high, transform) in enumerate(PARAMETER_RANGES):
+        if transform == 'log':
+            inputs[:, i] = np.exp(np.log(low) + unit[:, i] * (np.log(high) - np.log(low)))
+        else:
+            inputs[:, i] = low + unit[:, i] * (high - low)
+
+    names = _output_names(years)
+    percentiles = np.empty((runs, len(names)))
+    log_ratio = np.empty((runs, 2))
+    probabilities = np.empty((runs, len(METRIC_NAMES)))
+    run_seeds = rng.integers(2**32, size=runs)
+
+    # Every run has the same shape, so reuse one set of buffers
+    workspace = SimulationWorkspace(samples, years)
+
+    for run in range(runs):
+        data = _unflatten_parameters(inputs[run])
+        sim = AIProgressSimulation(
+            build_country_params(data['us']),
+            build_country_params(data['china'], is_china=True),
+            years=years, samples=samples, workspace=workspace, seed=int(run_seeds[run])
+        )
+        results = sim.run_simulation()
+        stats = sim.get_summary_statistics(results)
+        metrics = sim.get_outcome_metrics(results)
+
+        percentiles[run] = [stats[key][stat][year] for key, stat, year in names]
+        ratio = (np.log(np.maximum(results['china_progress'][-1], _RATIO_FLOOR)) -
+                 np.log(np.maximum(results['us_progress'][-1], _RATIO_FLOOR)))
+        log_ratio[run] = [ratio.mean(), np.log(max(ratio.std(), 1e-3))]
+        probabilities[run] = [metrics[name] for name in METRIC_NAMES]
+
+    return inputs, percentiles, log_ratio, probabilities
+
+
+class SimulationEmulator:
+    """
+    Quadratic response-surface emulator of AIProgressSimulation
+
+    Each percentile of each progress trajectory (log scale) and the final-year
+    log(China / US) ratio moments are ridge regressions on the constant,
+    linear and pairwise interaction terms of the transformed slider values.
+    Error estimates are the k-fold cross-validated RMSE of each reported
+    output against the simulation it replaces.
+    """
+
+    def __init__(self, coefficients: np.ndarray, error: np.ndarray,
+                 metrics_error: Dict[str, float], years: int, samples: int,
+                 runs: int, ridge: float):
+        self.coefficients = coefficients
+        self.error = error
+        self.metrics_error = metrics_error
+        self.years = years
+        self.samples = samples
+        self.runs = runs
+        self.ridge = ridge
+        self.output_names = _output_names(years)
+
+    @staticmethod
+    def _evaluate(features: np.ndarray, coefficients: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predicted percentile outputs and probabilities for a feature matrix"""
+        transformed = features @ coefficients
+        percentiles = np.expm1(transformed[:, :-2])
+        probabilities = _ratio_probabilities(transformed[:, -2], transformed[:, -1])
+        return percentiles, probabilities
+
+    @classmethod
+    def fit(cls, inputs: np.ndarray, percentiles: np.ndarray, log_ratio: np.ndarray,
+            probabilities: np.ndarray, years: int, samples: int, ridge: float = 0.1,
+            folds: int = 5, seed: int = 0) -> 'SimulationEmulator':
+        """
+        Fit the emulator to a simulated design
+
+        Args:
+            inputs, percentiles, log_ratio, probabilities: Output of run_design
+            years: Years simulated per scenario
+            samples: Monte Carlo samples per scenario
+            ridge: L2 penalty on the (non-intercept) coefficients
+            folds: Number of cross-validation folds for the error estimates
+            seed: Seed for the fold assignment
+
+        Returns:
+            Fitted SimulationEmulator
+        """
+        features = _quadratic_features(_scale_inputs(inputs))
+        # Progress indices span orders of magnitude, so fit them on a log scale
+        targets = np.hstack([np.log1p(percentiles), log_ratio])
+
+        # Cross-validated RMSE per output, in the original units
+        fold_ids = np.random.default_rng(seed).permutation(len(inputs)) % folds
+        squared_error = np.zeros(percentiles.shape[1])
+        squared_metrics_error = np.zeros(len(METRIC_NAMES))
+        for fold in range(folds):
+            held_out = fold_ids == fold
+            coefficients = _ridge_fit(features[~held_out], targets[~held_out], ridge)
+            predicted, predicted_probabilities = cls._evaluate(features[held_out], coefficients)
+            squared_error += np.sum((predicted - percentiles[held_out]) ** 2, axis=0)
+            squared_metrics_error += np.sum(
+                (predicted_probabilities - probabilities[held_out]) ** 2, axis=0
+            )
+        error = np.sqrt(squared_error / len(inputs))
+        metrics_error = dict(zip(METRIC_NAMES, np.sqrt(squared_metrics_error / len(inputs)).tolist()))
+
+        coefficients = _ridge_fit(features, targets, ridge)
+        return cls(coefficients, error, metrics_error, years, samples, len(inputs), ridge)
+
+    def predict(self, data: Dict) -> Dict:
+        """
+        Emulate a simulation from an /api/simulate style payload
+
+        The emulator reproduces the trained horizon only. The payload's
+        'samples' is ignored: predictions approximate the simulation's
+        expected output, with the Monte Carlo noise of the training runs
+        included in the error estimates.
+
+        Returns:
+            Dictionary with 'stats' and 'metrics' shaped like the /api/simulate
+            response, plus matching 'error' estimates
+
+        Raises:
+            ValueError: If the payload asks for a different number of years or
+                        a parameter is missing or not a number
+        """
+        years = int(data.get('years', self.years))
+        if years != self.years:
+            raise ValueError(f"Emulator was trained for {self.years} years, not {years}; "
+                             f"use /api/simulate for other horizons")
+
+        features = _quadratic_features(_scale_inputs(_flatten_parameters(data)))
+        predicted, probabilities = self._evaluate(features, self.coefficients)
+
+        stats = {key: {stat: [0.0] * self.years for stat in PERCENTILE_NAMES}
+                 for key in EMULATED_KEYS}
+        stats_error = {key: {stat: [0.0] * self.years for stat in PERCENTILE_NAMES}
+                       for key in EMULATED_KEYS}
+
+        for (key, stat, year), value, error in zip(self.output_names, predicted[0], self.error):
+            stats[key][stat][year] = float(value)
+            stats_error[key][stat][year] = float(error)
+
+        metrics = dict(zip(METRIC_NAMES, probabilities[0].tolist()))
+        metrics['us_final_median'] = stats['us_progress']['p50'][-1]
+        metrics['china_final_median'] = stats['china_progress']['p50'][-1]
+
+        metrics_error = dict(self.metrics_error)
+        metrics_error['us_final_median'] = stats_error['us_progress']['p50'][-1]
+        metrics_error['china_final_median'] = stats_error['china_progress']['p50'][-1]
+
+        return {
+            'stats': stats,
+            'years': self.years,
+            'metrics': metrics,
+            'error': {'stats': stats_error, 'metrics': metrics_error},
+        }
+
+    def to_dict(self) -> Dict:
+        """Serialise the emulator (coefficients can also be shipped to the browser)"""
+        return {
+            'years': self.years,
+            'samples': self.samples,
+            'runs': self.runs,
+            'ridge': self.ridge,
+            'parameters': [list(r) for r in PARAMETER_RANGES],
+            'coefficients': self.coefficients.tolist(),
+            'error': self.error.tolist(),
+            'metrics_error': self.metrics_error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SimulationEmulator':
+        """Load an emulator produced by to_dict"""
+        if [tuple(r) for r in data['parameters']] != PARAMETER_RANGES:
+            raise ValueError('Emulator was trained on different parameter ranges; retrain it')
+        return cls(np.array(data['coefficients']), np.array(data['error']),
+                   data['metrics_error'], data['years'], data['samples'],
+                   data['runs'], data['ridge'])
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        """Write the emulator to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> 'SimulationEmulator':
+        """Read an emulator written by save"""
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train the simulation emulator')
+    parser.add_argument('--runs', type=int, default=1500, help='Scenarios in the design')
+    parser.add_argument('--years', type=int, default=10, help='Years per scenario')
+    parser.add_argument('--samples', type=int, default=200, help='Monte Carlo samples per scenario')
+    parser.add_argument('--ridge', type=float, default=0.1, help='L2 penalty')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help='Model file to write')
+    args = parser.parse_args()
+
+    start = time.time()
+    design = run_design(args.runs, args.years, args.samples, args.seed)
+    print(f"Ran {args.runs} scenarios in {time.time() - start:.1f}s")
+
+    emulator = SimulationEmulator.fit(*design, args.years, args.samples,
+                                      ridge=args.ridge, seed=args.seed)
+    emulator.save(args.output)
+
+    for key in EMULATED_KEYS:
+        index = emulator.output_names.index((key, 'p50', args.years - 1))
+        print(f"Cross-validated RMSE {key} final median: {emulator.error[index]:.3f}")
+    for name, error in emulator.metrics_error.items():
+        print(f"Cross-validated RMSE {name}: {error:.3f}")
+    print(f"Saved emulator to {args.output}")
@@ -0,0 +1,440 @@
+"""
+Scenario cache for the AI Policy Simulation
+
+Stores each scenario's results and summary statistics together with its
+SimulationState, so a request for a shorter horizon is served from the
+stored prefix and a request for a longer horizon only simulates the
+additional years.
+
+SimulationCache lives in one process. SharedSimulationCache additionally
+publishes runs to a memory-mapped file so that every server worker process
+sees the scenarios computed by the others.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import zlib
+import numpy as np
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Dict, Optional, Tuple
+import ai_policy_simulation
+from ai_policy_simulation import AIProgressSimulation, SimulationState, RESULT_KEYS
+
+
+# (results, summary statistics, state) for the longest horizon simulated
+CacheEntry = Tuple[Dict[str, np.ndarray], Dict, SimulationState]
+
+
+def scenario_key(sim: AIProgressSimulation) -> Tuple:
+    """Cache key for everything that determines a run except its horizon"""
+    return (astuple(sim.us_params), astuple(sim.china_params), sim.samples)
+
+
+def _entry_bytes(entry: CacheEntry) -> int:
+    """Memory held by the result arrays of a cache entry"""
+    return sum(data.nbytes for data in entry[0].values())
+
+
+def _slice_stats(stats: Dict, years: int) -> Dict:
+    """Summary statistics for the first `years` years (percentiles are per year)"""
+    return {key: {name: values[:years] for name, values in percentiles.items()}
+            for key, percentiles in stats.items()}
+
+
+class SimulationCache:
+    """
+    Thread-safe LRU cache of simulation runs keyed by scenario
+
+    Entries hold the longest horizon simulated so far for the scenario. The
+    cache is bounded both by entry count and by the memory of the cached
+    result arrays; a run larger than max_bytes on its own is not cached.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 256 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, CacheEntry]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def run(self, sim: AIProgressSimulation) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """
+        Return results for `sim`, reusing or extending a cached run if possible
+
+        Args:
+            sim: Simulation describing the scenario and horizon to run
+
+        Returns:
+            Tuple of (results, summary statistics) for the first sim.years years
+        """
+        scenario = scenario_key(sim)
+        years = sim.years
+        entry = self._lookup(scenario, years)
+
+        if entry is None:
+            results = sim.run_simulation()
+            if sim.workspace is not None:
+                # Take the result buffers, which the workspace's next run would overwrite
+                results = sim.workspace.detach_results(sim.years)
+            stats = sim.get_summary_statistics(results)
+        else:
+            results, stats, state = entry
+            if state.years >= years:
+                return ({name: data[:years] for name, data in results.items()},
+                        _slice_stats(stats, years))
+            results = sim.extend_simulation(results, years - state.years, state)
+
+            # Only the new years need summarising
+            new_stats = sim.get_summary_statistics(
+                {name: data[state.years:] for name, data in results.items()}
+            )
+            stats = {key: {name: stats[key][name] + values for name, values in percentiles.items()}
+                     for key, percentiles in new_stats.items()}
+
+        self._store(scenario, (results, stats, sim.state))
+        return results, stats
+
+    def _lookup(self, key: Tuple, years: int) -> Optional[CacheEntry]:
+        """Find the cached entry for `key`, if any"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: Tuple, entry: CacheEntry):
+        """Cache `entry` unless a longer run of the scenario is already cached or it is too large"""
+        if _entry_bytes(entry) > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[2].years < entry[2].years:
+                if cached is not None:
+                    self._bytes -= _entry_bytes(cached)
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._bytes += _entry_bytes(entry)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _entry_bytes(evicted)
+
+    def clear(self):
+        """Remove all cached runs"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# Layout of the shared cache file. Changes to the simulation model do not
+# need a bump: they change MODEL_FINGERPRINT (see _model_fingerprint).
+SHARED_CACHE_VERSION = 1
+STAT_NAMES = ['p10', 'p25', 'p50', 'p75', 'p90', 'mean']
+
+# Slot header: sequence, key digest, years, samples, payload length, crc32
+_HEADER = struct.Struct('<Q16sIIQI')
+_HEADER_SIZE = 64
+_SEQUENCE = struct.Struct('<Q')
+# RNG state after the MT19937 key: pos, has_gauss, cached_gaussian,
+# followed by the two initial TWh/compute ratios
+_RNG_TAIL = struct.Struct('<qqddd')
+_MT_KEY_BYTES = 624 * 4
+
+
+def _model_fingerprint() -> bytes:
+    """
+    Digest of the code that produced the cached runs
+
+    Covers the simulation and cache sources and the file layout, so runs
+    cached by a previous version of the model are never read, even from a
+    file that outlived a restart or deploy.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in (ai_policy_simulation.__file__, __file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    layout = (SHARED_CACHE_VERSION, RESULT_KEYS, STAT_NAMES, _HEADER.format, _RNG_TAIL.format)
+    digest.update(repr(layout).encode())
+    return digest.digest()
+
+
+MODEL_FINGERPRINT = _model_fingerprint()
+_FILE_PREFIX = 'ai-policy-sim-cache'
+
+
+def default_shared_cache_path(slots: int, slot_size: int) -> str:
+    """Shared cache file in /dev/shm when available (RAM-backed), else the temp dir"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    name = f'{_FILE_PREFIX}-{os.geteuid()}-{MODEL_FINGERPRINT.hex()[:16]}-{slots}x{slot_size}'
+    return os.path.join(directory, name)
+
+
+def _remove_stale_shared_caches(path: str):
+    """
+    Delete this user's cache files left behind by other model versions
+
+    Only the fingerprint part of the name is compared: files of the current
+    model with another slot layout may belong to a running instance. Files
+    of other versions are only deleted if no process has them open as a
+    cache (see SharedSimulationCache._hold_file), since another checkout
+    or deploy may still be running them.
+    """
+    directory = os.path.dirname(path)
+    prefix = f'{_FILE_PREFIX}-{os.geteuid()}-'
+    fingerprint = MODEL_FINGERPRINT.hex()[:16]
+    for other in os.listdir(directory):
+        if not other.startswith(prefix) or other[len(prefix):].split('-')[0] == fingerprint:
+            continue
+        other_path = os.path.join(directory, other)
+        try:
+            fd = os.open(other_path, os.O_RDWR | os.O_NOFOLLOW | os.O_CLOEXEC)
+        except OSError:
+            continue
+        try:
+            # Any lock on the file, including a live instance's, makes this fail
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.unlink(other_path)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)  # Also releases the probe lock
+
+
+def _open_private_file(path: str) -> int:
+    """
+    Open (creating if needed) a regular file only the current user can access
+
+    The shared cache usually lives in a world-writable directory under a
+    predictable name, so refuse symlinks and files created by anyone else;
+    otherwise another local user could feed results to every worker.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW | os.O_CLOEXEC, 0o600)
+    info = os.fstat(fd)
+    if (not stat.S_ISREG(info.st_mode) or info.st_uid != os.geteuid()
+            or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO)):
+        os.close(fd)
+        raise PermissionError(f'Refusing to use shared cache file {path}: '
+                              f'it must be a regular file owned by and private to this user')
+    return fd
+
+
+class SharedSimulationCache(SimulationCache):
+    """
+    SimulationCache backed by a memory-mapped file shared between processes
+
+    The file is divided into fixed-size slots. A scenario hashes to a set of
+    `ways` consecutive slots and is stored in one of them. Each slot is
+    protected by a sequence counter (odd while being written) and a CRC of
+    its payload, so readers never take a lock: a read that overlaps a write
+    sees a changed counter or a bad checksum and is treated as a miss.
+    Writers take a non-blocking lock on the slot and skip the write if
+    another process holds it. Every instance also holds a shared lock past
+    the last slot for as long as it is open, which marks the file as live.
+
+    Runs too large for a slot are only cached in the local process.
+    """
+
+    def __init__(self, path: str = None, slots: int = 64, slot_size: int = 4 * 2**20,
+                 ways: int = 4, max_entries: int = 32, max_bytes: int = 256 * 2**20):
+        super().__init__(max_entries, max_bytes)
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ways = min(ways, slots)
+        self.path = path or default_shared_cache_path(slots, slot_size)
+        self._write_lock = threading.Lock()
+
+        if path is None:
+            _remove_stale_shared_caches(self.path)
+        self._fd = self._hold_file()
+        if os.fstat(self._fd).st_size < slots * slot_size:
+            os.ftruncate(self._fd, slots * slot_size)
+        self._mm = mmap.mmap(self._fd, slots * slot_size)
+
+    def _hold_file(self) -> int:
+        """
+        Open the cache file and mark it live with a shared lock held until close
+
+        The lock covers one byte past the slots, so slot write locks never
+        touch it. If another instance's cleanup unlinked the file between
+        the open and the lock, open the path again rather than cache into a
+        file no one else can see.
+        """
+        while True:
+            fd = _open_private_file(self.path)
+            fcntl.lockf(fd, fcntl.LOCK_SH, 1, self.slots * self.slot_size)
+            try:
+                if os.stat(self.path, follow_symlinks=False).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _try_lock_slot(self, offset: int) -> bool:
+        """Take the write lock of the slot at `offset` unless another process holds it"""
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, self.slot_size, offset)
+            return True
+        except OSError:
+            return False
+
+    def _unlock_slot(self, offset: int):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, offset)
+
+    @staticmethod
+    def _digest(key: Tuple) -> bytes:
+        # Keyed by the model so entries written by other code never match
+        return hashlib.blake2b(repr(key).encode(), digest_size=16,
+                               key=MODEL_FINGERPRINT).digest()
+
+    def _candidate_slots(self, digest: bytes):
+        start = int.from_bytes(digest[:8], 'little') % self.slots
+        return [(start + i) % self.slots for i in range(self.ways)]
+
+    def _lookup(self, key: Tuple, years: int) -> Optional[CacheEntry]:
+        entry = super()._lookup(key, years)
+        if entry is not None and entry[2].years >= years:
+            return entry
+
+        shared = self._read_shared(key)
+        if shared is not None and (entry is None or shared[2].years > entry[2].years):
+            super()._store(key, shared)
+            return shared
+        return entry
+
+    def _store(self, key: Tuple, entry: CacheEntry):
+        super()._store(key, entry)
+        self._write_shared(key, entry)
+
+    def _read_shared(self, key: Tuple) -> Optional[CacheEntry]:
+        """Lock-free read of `key` from the shared file"""
+        digest = self._digest(key)
+        samples = key[2]
+
+        for slot in self._candidate_slots(digest):
+            offset = slot * self.slot_size
+            sequence, slot_digest, years, slot_samples, length, crc = \
+                _HEADER.unpack_from(self._mm, offset)
+            if sequence == 0 or sequence % 2 or slot_digest != digest or slot_samples != samples:
+                continue
+
+            payload = self._mm[offset + _HEADER_SIZE:offset + _HEADER_SIZE + length]
+            if _SEQUENCE.unpack_from(self._mm, offset)[0] != sequence:
+                continue  # Overwritten while reading
+            if zlib.crc32(payload) != crc:
+                continue
+            return self._decode(payload, years, samples)
+
+        return None
+
+    def _write_shared(self, key: Tuple, entry: CacheEntry):
+        """Publish `entry` to the shared file, skipping it if the slot is busy"""
+        results, stats, state = entry
+        if sorted(results) != sorted(RESULT_KEYS):
+            return
+        payload = self._encode(results, stats, state)
+        if _HEADER_SIZE + len(payload) > self.slot_size:
+            return
+
+        digest = self._digest(key)
+        candidates = self._candidate_slots(digest)
+        slot = None
+        for candidate in candidates:
+            sequence, slot_digest, years = _HEADER.unpack_from(self._mm, candidate * self.slot_size)[:3]
+            if slot_digest == digest:
+                if years >= state.years and sequence % 2 == 0:
+                    return  # Another worker already shared an equal or longer run
+                slot = candidate
+                break
+            if slot is None and sequence == 0:
+                slot = candidate
+        if slot is None:
+            slot = candidates[digest[8] % len(candidates)]
+
+        offset = slot * self.slot_size
+        with self._write_lock:
+            if not self._try_lock_slot(offset):
+                return
+            try:
+                sequence = _SEQUENCE.unpack_from(self._mm, offset)[0] | 1
+                _SEQUENCE.pack_into(self._mm, offset, sequence)
+                self._mm[offset + _HEADER_SIZE:offset + _HEADER_SIZE + len(payload)] = payload
+                _HEADER.pack_into(self._mm, offset, sequence, digest, state.years,
+                                  state.samples, len(payload), zlib.crc32(payload))
+                _SEQUENCE.pack_into(self._mm, offset, sequence + 1)
+            finally:
+                self._unlock_slot(offset)
+
+    @staticmethod
+    def _encode(results: Dict[str, np.ndarray], stats: Dict, state: SimulationState) -> bytes:
+        name, mt_key, pos, has_gauss, cached_gaussian = state.rng_state
+        stat_array = np.array([[stats[key][name] for name in STAT_NAMES] for key in RESULT_KEYS])
+        return b''.join([
+            np.ascontiguousarray(mt_key, dtype='<u4').tobytes(),
+            _RNG_TAIL.pack(pos, has_gauss, cached_gaussian,
+                           state.us_initial_twh_per_compute,
+                           state.china_initial_twh_per_compute),
+            np.stack([results[key] for key in RESULT_KEYS]).astype('<f8').tobytes(),
+            stat_array.astype('<f8').tobytes(),
+        ])
+
+    @staticmethod
+    def _decode(payload: bytes, years: int, samples: int) -> CacheEntry:
+        mt_key = np.frombuffer(payload, dtype='<u4', count=624).copy()
+        pos, has_gauss, cached_gaussian, us_twh, china_twh = \
+            _RNG_TAIL.unpack_from(payload, _MT_KEY_BYTES)
+
+        offset = _MT_KEY_BYTES + _RNG_TAIL.size
+        count = len(RESULT_KEYS) * years * samples
+        data = np.frombuffer(payload, dtype='<f8', count=count, offset=offset)
+        data = data.reshape(len(RESULT_KEYS), years, samples).copy()
+        results = dict(zip(RESULT_KEYS, data))
+
+        offset += count * 8
+        stat_array = np.frombuffer(payload, dtype='<f8', offset=offset,
+                                   count=len(RESULT_KEYS) * len(STAT_NAMES) * years)
+        stat_array = stat_array.reshape(len(RESULT_KEYS), len(STAT_NAMES), years)
+        stats = {key: {name: stat_array[i, j].tolist() for j, name in enumerate(STAT_NAMES)}
+                 for i, key in enumerate(RESULT_KEYS)}
+
+        state = SimulationState(
+            years=years,
+            samples=samples,
+            us_progress=results['us_progress'][-1],
+            china_progress=results['china_progress'][-1],
+            rng_state=('MT19937', mt_key, pos, has_gauss, cached_gaussian),
+            us_initial_twh_per_compute=us_twh,
+            china_initial_twh_per_compute=china_twh,
+        )
+        return results, stats, state
+
+    def clear(self):
+        """
+        Remove all cached runs, including those shared with other processes
+
+        Slots another process is writing are skipped and keep that entry.
+        """
+        super().clear()
+        with self._write_lock:
+            for slot in range(self.slots):
+                offset = slot * self.slot_size
+                if not self._try_lock_slot(offset):
+                    continue
+                try:
+                    _SEQUENCE.pack_into(self._mm, offset, 0)
+                finally:
+                    self._unlock_slot(offset)
+
+    def close(self):
+        """Unmap the shared file and release its locks"""
+        self._mm.close()
+        os.close(self._fd)
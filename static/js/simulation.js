@@ -6,6 +6,15 @@ let capitalChart = null;
 let talentChart = null;
 let energyChart = null;
 
+// Surrogate emulator state (see emulator.py)
+let emulatorAvailable = true;
+let previewInFlight = false;
+let previewPending = false;
+let hasResults = false;
+// Incremented by every runSimulation call; responses from older requests
+// are dropped so they cannot overwrite newer results
+let simulationGeneration = 0;
+
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function() {
     loadDefaults();
@@ -22,6 +31,13 @@ function setupInputListeners() {
     inputs.forEach(input => {
         input.addEventListener('input', function(e) {
             updateValueDisplay(e.target.id, e.target.value);
+            previewSimulation();
+        });
+        // Run the real simulation once the slider is released
+        input.addEventListener('change', function() {
+            if (hasResults) {
+                runSimulation(false);
+            }
         });
     });
 }
@@ -188,9 +204,93 @@ function getParameters() {
     };
 }
 
+// Update the headline metric cards
+function updateMetrics(metrics) {
+    document.getElementById('catchup-prob').textContent =
+        (metrics.catchup_probability * 100).toFixed(1) + '%';
+    document.getElementById('surpass-prob').textContent =
+        (metrics.surpass_probability * 100).toFixed(1) + '%';
+    document.getElementById('us-final').textContent =
+        metrics.us_final_median.toFixed(2);
+    document.getElementById('china-final').textContent =
+        metrics.china_final_median.toFixed(2);
+}
+
+// Preview results from the surrogate emulator while a slider is dragged
+async function previewSimulation() {
+    if (!emulatorAvailable) return;
+
+    // Only keep one request in flight; coalesce ticks that arrive meanwhile
+    if (previewInFlight) {
+        previewPending = true;
+        return;
+    }
+    previewInFlight = true;
+    const generation = simulationGeneration;
+
+    try {
+        const response = await fetch('/api/emulate', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(getParameters())
+        });
+
+        if (response.status === 404) {
+            // No emulator has been built; fall back to the real simulation only
+            emulatorAvailable = false;
+            return;
+        }
+        if (!response.ok || generation !== simulationGeneration) {
+            // Unsupported request (e.g. another horizon), or the real
+            // simulation was started after this preview was requested
+            return;
+        }
+
+        const data = await response.json();
+        if (generation !== simulationGeneration) return;
+        const error = data.error.metrics;
+
+        document.getElementById('live-estimate').style.display = 'block';
+        document.getElementById('live-catchup').textContent =
+            (data.metrics.catchup_probability * 100).toFixed(0) + '% \u00b1 ' +
+            (error.catchup_probability * 100).toFixed(0);
+        document.getElementById('live-surpass').textContent =
+            (data.metrics.surpass_probability * 100).toFixed(0) + '% \u00b1 ' +
+            (error.surpass_probability * 100).toFixed(0);
+
+        if (hasResults) {
+            updateMetrics(data.metrics);
+
+            // Update the progress chart in place so dragging stays smooth
+            const bands = [
+                data.stats.us_progress.p50, data.stats.us_progress.p75, data.stats.us_progress.p25,
+                data.stats.china_progress.p50, data.stats.china_progress.p75, data.stats.china_progress.p25,
+            ];
+            bands.forEach((band, i) => {
+                progressChart.data.datasets[i].data = band;
+            });
+            progressChart.update('none');
+        }
+    } catch (error) {
+        console.error('Error previewing simulation:', error);
+    } finally {
+        previewInFlight = false;
+        if (previewPending) {
+            previewPending = false;
+            previewSimulation();
+        }
+    }
+}
+
 // Run the simulation
-async function runSimulation() {
+async function runSimulation(switchTab = true) {
     const loading = document.getElementById('loading');
+    const generation = ++simulationGeneration;
+
+    // Previews still queued describe parameters this run already covers
+    previewPending = false;
 
     // Show loading state
     loading.classList.add('active');
@@ -206,30 +306,30 @@ async function runSimulation() {
         });
 
         const data = await response.json();
+        if (generation !== simulationGeneration) return;
 
-        // Update metrics
-        document.getElementById('catchup-prob').textContent =
-            (data.metrics.catchup_probability * 100).toFixed(1) + '%';
-        document.getElementById('surpass-prob').textContent =
-            (data.metrics.surpass_probability * 100).toFixed(1) + '%';
-        document.getElementById('us-final').textContent =
-            data.metrics.us_final_median.toFixed(2);
-        document.getElementById('china-final').textContent =
-            data.metrics.china_final_median.toFixed(2);
+        updateMetrics(data.metrics);
+        document.getElementById('live-estimate').style.display = 'none';
 
         // Create charts
         createProgressChart(data.stats, data.years);
         createTrainingCapacityChart(data.stats, data.years);
         createFactorCharts(data.stats, data.years);
 
+        hasResults = true;
+
         // Switch to progress tab to show results
-        showTab('progress');
+        if (switchTab) {
+            showTab('progress');
+        }
 
     } catch (error) {
         console.error('Error running simulation:', error);
         alert('Error running simulation. Please try again.');
     } finally {
-        loading.classList.remove('active');
+        if (generation === simulationGeneration) {
+            loading.classList.remove('active');
+        }
     }
 }
 
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests for the web API (run with python -m pytest tests)"""
+
+import os
+import sys
+
+import pytest
+
+# Add the repository root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as app_module
+from emulator import SimulationEmulator, run_design
+from test_simulation import US_VALUES, CHINA_VALUES
+
+
+@pytest.fixture
+def client():
+    app_module.simulation_cache.clear()
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def simulate(client, **options):
+    return client.post('/api/simulate', json={'us': US_VALUES, 'china': CHINA_VALUES, **options})
+
+
+def test_simulate_rejects_oversized_runs(client):
+    max_samples = app_module.config['simulation']['max_samples']
+    max_years = app_module.config['simulation'].get('max_years', 100)
+
+    for options in ({'samples': max_samples + 1}, {'samples': 0},
+                    {'years': max_years + 1}, {'years': 0}, {'years': 'ten'}, {'samples': None}):
+        response = simulate(client, **options)
+        assert response.status_code == 400, options
+        assert 'error' in response.get_json()
+
+    response = simulate(client, years=3, samples=50)
+    assert response.status_code == 200
+    assert len(response.get_json()['stats']['us_progress']['p50']) == 3
+
+
+def test_emulate_rejects_invalid_requests(client, monkeypatch):
+    emulator = SimulationEmulator.fit(*run_design(60, years=3, samples=50, seed=1), 3, 50)
+    monkeypatch.setattr(app_module, 'emulator', emulator)
+
+    response = client.post('/api/emulate', json={'us': US_VALUES, 'china': CHINA_VALUES, 'years': 3})
+    assert response.status_code == 200
+
+    china = {name: value for name, value in CHINA_VALUES.items() if name != 'talent_mean'}
+    for payload in ({'us': US_VALUES, 'china': CHINA_VALUES, 'years': 10},
+                    {'us': US_VALUES, 'china': china, 'years': 3},
+                    {'us': US_VALUES, 'china': CHINA_VALUES, 'years': None}):
+        response = client.post('/api/emulate', json=payload)
+        assert response.status_code == 400, payload
+        assert 'error' in response.get_json()
+
+
+def test_confidence_intervals_reject_invalid_options(client, monkeypatch):
+    response = simulate(client, years=3, samples=50, confidence_intervals=True)
+    assert response.status_code == 200
+    intervals = response.get_json()['confidence_intervals']
+    assert intervals['method'] == 'analytic'
+    assert sorted(intervals['stats']) == sorted(app_module.CONFIDENCE_KEYS)
+
+    response = simulate(client, years=3, samples=50, confidence_intervals=True,
+                        confidence_keys=['us_compute'])
+    assert sorted(response.get_json()['confidence_intervals']['stats']) == \
+        ['china_progress', 'us_compute', 'us_progress']
+
+    # Budget for 200 replicates of the four default series, but not of a fifth
+    max_replicates = app_module.config['simulation'].get('max_bootstrap_replicates', 1000)
+    monkeypatch.setitem(app_module.config['simulation'], 'max_bootstrap_elements', 200 * 50 * 3 * 4)
+    response = simulate(client, years=3, samples=50, confidence_intervals=True,
+                        confidence_method='bootstrap', bootstrap_replicates=200)
+    assert response.status_code == 200
+
+    for options in ({'confidence_level': None}, {'confidence_level': 'high'},
+                    {'confidence_level': 1.5}, {'confidence_method': 'jackknife'},
+                    {'confidence_keys': ['us_speed']}, {'samples': 1},
+                    {'confidence_method': 'bootstrap', 'bootstrap_replicates': max_replicates + 1},
+                    {'confidence_method': 'bootstrap', 'bootstrap_replicates': None},
+                    {'confidence_method': 'bootstrap', 'bootstrap_replicates': 200,
+                     'confidence_keys': app_module.CONFIDENCE_KEYS + ['us_compute']}):
+        response = simulate(client, **{'years': 3, 'samples': 50, 'confidence_intervals': True,
+                                       **options})
+        assert response.status_code == 400, options
+        assert 'error' in response.get_json()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Tests for the surrogate emulator (run with python -m pytest tests)"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the repository root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from emulator import (
+    METRIC_NAMES,
+    PARAMETER_RANGES,
+    SimulationEmulator,
+    _unflatten_parameters,
+    latin_hypercube,
+    run_design,
+)
+
+YEARS = 3
+SAMPLES = 50
+
+
+@pytest.fixture(scope='module')
+def design():
+    return run_design(60, years=YEARS, samples=SAMPLES, seed=1)
+
+
+@pytest.fixture(scope='module')
+def emulator(design):
+    return SimulationEmulator.fit(*design, YEARS, SAMPLES)
+
+
+def test_latin_hypercube_samples_every_stratum_once():
+    runs, dims = 40, 5
+    unit = latin_hypercube(runs, dims, np.random.default_rng(0))
+    assert unit.shape == (runs, dims)
+    assert np.all((unit >= 0) & (unit < 1))
+    for column in unit.T:
+        assert sorted(np.floor(column * runs).astype(int)) == list(range(runs))
+
+
+def test_predictions_reproduce_the_design(design, emulator):
+    inputs, percentiles, _, _ = design
+    for run in range(5):
+        prediction = emulator.predict(_unflatten_parameters(inputs[run]))
+        predicted = [prediction['stats'][key][stat][year]
+                     for key, stat, year in emulator.output_names]
+        np.testing.assert_allclose(predicted, percentiles[run], rtol=0.01)
+
+        assert prediction['years'] == YEARS
+        for name in METRIC_NAMES:
+            assert 0 <= prediction['metrics'][name] <= 1
+            assert prediction['error']['metrics'][name] >= 0
+
+
+def test_round_trip_preserves_predictions(design, emulator):
+    payload = _unflatten_parameters(design[0][0])
+    loaded = SimulationEmulator.from_dict(emulator.to_dict())
+    assert loaded.predict(payload) == emulator.predict(payload)
+
+
+def test_rejects_model_trained_on_other_ranges(emulator):
+    data = emulator.to_dict()
+    data['parameters'] = [list(r) for r in PARAMETER_RANGES[:-1]]
+    with pytest.raises(ValueError, match='parameter ranges'):
+        SimulationEmulator.from_dict(data)
+
+
+def test_rejects_invalid_payloads(design, emulator):
+    payload = _unflatten_parameters(design[0][0])
+    with pytest.raises(ValueError, match='years'):
+        emulator.predict({**payload, 'years': YEARS + 1})
+
+    del payload['china']['compute_mean']
+    with pytest.raises(ValueError, match='china.compute_mean'):
+        emulator.predict(payload)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Tests for the simulation engine (run with python -m pytest tests)"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+# Add the repository root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai_policy_simulation import (
+    AIProgressSimulation,
+    PERCENTILES,
+    SimulationWorkspace,
+    _bootstrap_statistics,
+    build_country_params,
+)
+
+# Slider values as sent by the web UI
+US_VALUES = {
+    'compute_mean': 3.5, 'compute_growth_rate': 0.5, 'compute_constraint': 0.95,
+    'capital_mean': 109, 'capital_growth_rate': 0.3, 'capital_constraint': 0.9,
+    'talent_mean': 63, 'talent_growth_rate': 0.08, 'talent_constraint': 0.85,
+    'energy_mean': 183, 'total_grid_energy': 4300, 'grid_growth_rate': 0.025,
+    'efficiency_improvement_rate': -0.05, 'grid_saturation_threshold': 0.09,
+}
+CHINA_VALUES = {
+    'compute_mean': 0.6, 'compute_growth_rate': 0.35, 'compute_constraint': 0.45,
+    'capital_mean': 98, 'capital_growth_rate': 0.25, 'capital_constraint': 0.7,
+    'talent_mean': 52, 'talent_growth_rate': 0.12, 'talent_constraint': 0.75,
+    'energy_mean': 104, 'total_grid_energy': 9000, 'grid_growth_rate': 0.06,
+    'efficiency_improvement_rate': -0.04, 'grid_saturation_threshold': 0.05,
+}
+
+
+def make_simulation(years=10, samples=200, **kwargs):
+    """Simulation of a fixed scenario"""
+    return AIProgressSimulation(build_country_params(US_VALUES),
+                                build_country_params(CHINA_VALUES, is_china=True),
+                                years=years, samples=samples, **kwargs)
+
+
+def reference_simulation(us_params, china_params, years, samples, seed):
+    """
+    Straightforward transcription of the engine before it wrote into
+    preallocated buffers, used to check the in-place version is bit-identical
+    """
+    rng = np.random.RandomState(seed)
+    weights = {'compute': 0.40, 'capital': 0.25, 'talent': 0.25, 'energy': 0.10}
+
+    def sample_factor(mean, std, growth_rate, constraint, year):
+        effective_growth = growth_rate + rng.normal(0, 0.02, samples)
+        year_mean = mean * ((1 + effective_growth) ** year)
+        year_std = std * ((1 + effective_growth) ** year)
+        log_mean = np.log(year_mean ** 2 / np.sqrt(year_mean ** 2 + year_std ** 2))
+        log_std = np.sqrt(np.log(1 + year_std ** 2 / year_mean ** 2))
+        values = rng.lognormal(log_mean, log_std, samples)
+        return np.minimum(values, year_mean * 3 * constraint)
+
+    def energy_for_year(params, year, compute, initial_twh_per_compute):
+        grid_growth = rng.normal(params.grid_growth_rate, 0.005, samples)
+        total_grid = params.total_grid_energy * ((1 + grid_growth) ** year)
+        available = total_grid * params.grid_saturation_threshold
+        twh_per_compute = initial_twh_per_compute * (1 + params.efficiency_improvement_rate) ** year
+        required = compute * twh_per_compute
+        return total_grid, available, required, np.minimum(required, available)
+
+    def training_capacity(compute, energy, is_china):
+        utilization = 0.35 if is_china else 0.40
+        theoretical = compute * 1e6 * utilization * 1e15 * 3.15e7
+        required = compute * 1e6 * 350e-12 * utilization * 8760
+        return theoretical * np.minimum(1.0, energy * 0.4 / required) / 1e24
+
+    results = {}
+    previous = {}
+    for year in range(years):
+        factors = {}
+        for country, params in (('us', us_params), ('china', china_params)):
+            for factor in ('compute', 'capital', 'talent'):
+                factors[f'{country}_{factor}'] = sample_factor(
+                    getattr(params, f'{factor}_mean'), getattr(params, f'{factor}_std'),
+                    getattr(params, f'{factor}_growth_rate'),
+                    getattr(params, f'{factor}_constraint'), year)
+            energy = energy_for_year(params, year, factors[f'{country}_compute'],
+                                     params.energy_mean / params.compute_mean)
+            for name, value in zip(('total_grid', 'energy_available', 'energy_required', 'energy'),
+                                   energy):
+                factors[f'{country}_{name}'] = value
+
+        for country in ('us', 'china'):
+            progress = (
+                (factors[f'{country}_compute'] ** weights['compute']) *
+                (factors[f'{country}_capital'] ** weights['capital']) *
+                (factors[f'{country}_talent'] ** weights['talent']) *
+                (factors[f'{country}_energy'] ** weights['energy'])
+            )
+            progress = progress * (1 + 0.1 * np.log1p(previous.get(country, np.ones(samples))))
+            previous[country] = factors[f'{country}_progress'] = progress
+            factors[f'{country}_training_capacity'] = training_capacity(
+                factors[f'{country}_compute'], factors[f'{country}_energy'], country == 'china')
+
+        for key, value in factors.items():
+            results.setdefault(key, []).append(value)
+
+    return {key: np.array(values) for key, values in results.items()}
+
+
+def assert_results_equal(results, expected):
+    assert sorted(results) == sorted(expected)
+    for key in expected:
+        np.testing.assert_array_equal(results[key], expected[key], err_msg=key)
+
+
+def test_extension_matches_single_longer_run():
+    expected = make_simulation(years=40, seed=7).run_simulation()
+
+    sim = make_simulation(years=10, seed=7)
+    results = sim.run_simulation()
+    results = sim.extend_simulation(results, 30)
+
+    assert_results_equal(results, expected)
+
+
+def test_extension_is_unaffected_by_concurrent_simulations():
+    expected = make_simulation(years=40, seed=7).run_simulation()
+
+    sim = make_simulation(years=10, seed=7)
+    results = sim.run_simulation()
+    state = sim.state
+
+    stop = threading.Event()
+
+    def run_other_simulations():
+        while not stop.is_set():
+            make_simulation(years=5).run_simulation()
+            np.random.seed()  # Must not affect simulations either
+
+    others = [threading.Thread(target=run_other_simulations) for _ in range(2)]
+    for thread in others:
+        thread.start()
+    try:
+        for _ in range(5):
+            extended = make_simulation(years=10, seed=123).extend_simulation(results, 30, state)
+            assert_results_equal(extended, expected)
+    finally:
+        stop.set()
+        for thread in others:
+            thread.join()
+
+
+def test_workspace_output_matches_reference_engine():
+    expected = reference_simulation(build_country_params(US_VALUES),
+                                    build_country_params(CHINA_VALUES, is_china=True),
+                                    years=12, samples=200, seed=3)
+
+    assert_results_equal(make_simulation(years=12, seed=3).run_simulation(), expected)
+
+    # Reuse a workspace that already holds another, longer run
+    workspace = SimulationWorkspace(200)
+    make_simulation(years=20, seed=4, workspace=workspace).run_simulation()
+    results = make_simulation(years=12, seed=3, workspace=workspace).run_simulation()
+    assert_results_equal(results, expected)
+
+
+def test_bootstrap_statistics_match_per_replicate_reference():
+    rng = np.random.default_rng(0)
+    data = rng.lognormal(size=(7, 150))
+    data[:, :10] = data[:, 10:20]  # Ties
+    weights = rng.poisson(1.0, (40, 150))
+
+    # Small working arrays force several year chunks
+    replicated = _bootstrap_statistics(data, weights, max_elements=2 * 40 * 150)
+
+    for r, counts in enumerate(weights):
+        for year in range(data.shape[0]):
+            resampled = np.repeat(data[year], counts)
+            for name, q in PERCENTILES.items():
+                expected = np.percentile(resampled, q, method='inverted_cdf')
+                assert replicated[name][r, year] == expected, (name, r, year)
+            assert np.isclose(replicated['mean'][r, year], resampled.mean())
+
+
+def test_confidence_intervals_reject_invalid_arguments():
+    sim = make_simulation(years=3, samples=50, seed=1)
+    results = sim.run_simulation()
+    for level in (0, 1, -0.5, 1.5):
+        with pytest.raises(ValueError, match='level'):
+            sim.get_confidence_intervals(results, level=level)
+    with pytest.raises(ValueError, match='replicates'):
+        sim.get_confidence_intervals(results, method='bootstrap', replicates=0)
+    with pytest.raises(ValueError, match='keys'):
+        sim.get_confidence_intervals(results, keys=['us_speed'])
+
+    sim = make_simulation(years=3, samples=1, seed=1)
+    with pytest.raises(ValueError, match='2 samples'):
+        sim.get_confidence_intervals(sim.run_simulation())
+
+
+def test_analytic_intervals_contain_estimates_and_narrow_with_samples():
+    widths = []
+    for samples in (100, 2000):
+        sim = make_simulation(years=5, samples=samples, seed=2)
+        results = sim.run_simulation()
+        stats = sim.get_summary_statistics(results)
+        metrics = sim.get_outcome_metrics(results)
+        intervals = sim.get_confidence_intervals(results, level=0.9, method='analytic')
+
+        for key, bounds in intervals['stats'].items():
+            for name, interval in bounds.items():
+                lower, upper = np.array(interval['lower']), np.array(interval['upper'])
+                assert np.all(lower <= stats[key][name]), (key, name)
+                assert np.all(np.array(stats[key][name]) <= upper), (key, name)
+        for name, (lower, upper) in intervals['metrics'].items():
+            assert lower <= metrics[name] <= upper, name
+
+        widths.append({key: np.subtract(bounds['p50']['upper'], bounds['p50']['lower'])
+                       for key, bounds in intervals['stats'].items()})
+
+    # Year 0 of some series has no randomness, so only the final year must narrow strictly
+    for key in widths[0]:
+        assert np.all(widths[1][key] <= widths[0][key]), key
+        assert widths[1][key][-1] < widths[0][key][-1], key
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Tests for the scenario caches (run with python -m pytest tests)"""
+
+import fcntl
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import replace
+
+import pytest
+
+# Add the repository root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import simulation_cache
+from ai_policy_simulation import RESULT_KEYS, SimulationWorkspace
+from simulation_cache import SharedSimulationCache, SimulationCache, scenario_key, _HEADER_SIZE, _SEQUENCE
+from test_simulation import make_simulation, assert_results_equal
+
+# The shared cache relies on fork-safe POSIX file locks
+context = multiprocessing.get_context('fork')
+
+SLOT_SIZE = 2**20
+
+
+def open_cache(path, **kwargs):
+    return SharedSimulationCache(path=str(path), slots=8, slot_size=SLOT_SIZE, **kwargs)
+
+
+def entry_slot(cache, key):
+    """Offset of the slot holding `key` in the shared file"""
+    digest = cache._digest(key)
+    for slot in cache._candidate_slots(digest):
+        if cache._mm[slot * cache.slot_size + 8:slot * cache.slot_size + 24] == digest:
+            return slot * cache.slot_size
+    raise AssertionError('Entry not found in the shared file')
+
+
+def _run_in_child(path, years, seed):
+    cache = open_cache(path)
+    cache.run(make_simulation(years=years, samples=50, seed=seed))
+    cache.close()
+
+
+def test_shared_round_trip_between_processes(tmp_path):
+    path = tmp_path / 'cache'
+    child = context.Process(target=_run_in_child, args=(path, 10, 1))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    # A cache hit returns the child's draws, not this simulation's own seed
+    expected = make_simulation(years=10, samples=50, seed=1).run_simulation()
+    cache = open_cache(path)
+    results, stats = cache.run(make_simulation(years=6, samples=50, seed=2))
+    assert_results_equal(results, {key: data[:6] for key, data in expected.items()})
+
+    # Extending the shared run continues the child's random stream
+    expected = make_simulation(years=15, samples=50, seed=1).run_simulation()
+    results, _ = cache.run(make_simulation(years=15, samples=50, seed=2))
+    assert_results_equal(results, expected)
+    cache.close()
+
+
+def test_read_during_write_is_a_miss(tmp_path):
+    cache = open_cache(tmp_path / 'cache')
+    sim = make_simulation(years=10, samples=50, seed=1)
+    key = scenario_key(sim)
+    cache.run(sim)
+    offset = entry_slot(cache, key)
+    assert cache._read_shared(key) is not None
+
+    # Odd sequence: a writer is part way through the slot
+    sequence = _SEQUENCE.unpack_from(cache._mm, offset)[0]
+    _SEQUENCE.pack_into(cache._mm, offset, sequence + 1)
+    assert cache._read_shared(key) is None
+
+    # Torn payload under an even sequence fails the checksum
+    _SEQUENCE.pack_into(cache._mm, offset, sequence + 2)
+    cache._mm[offset + _HEADER_SIZE + 100] ^= 0xFF
+    assert cache._read_shared(key) is None
+    cache.close()
+
+
+def _rewrite_continuously(path, entries, stop):
+    cache = open_cache(path)
+    while not stop.is_set():
+        cache.clear()
+        for key, entry in entries:
+            cache._write_shared(key, entry)
+    cache.close()
+
+
+def test_concurrent_reads_never_see_torn_entries(tmp_path):
+    path = tmp_path / 'cache'
+    sim = make_simulation(years=40, samples=50, seed=1)
+    key = scenario_key(sim)
+    full = sim.run_simulation()
+    stats = sim.get_summary_statistics(full)
+
+    # Ever longer runs of the same scenario, so every write replaces the slot
+    entries = []
+    for years in range(5, 41):
+        state = replace(sim.state, years=years)
+        entries.append((key, ({name: data[:years] for name, data in full.items()},
+                              simulation_cache._slice_stats(stats, years), state)))
+
+    stop = context.Event()
+    writer = context.Process(target=_rewrite_continuously, args=(path, entries, stop))
+    cache = open_cache(path)
+    writer.start()
+    hits = 0
+    try:
+        deadline = time.time() + 2
+        while time.time() < deadline:
+            entry = cache._read_shared(key)
+            if entry is None:
+                continue
+            results, _, state = entry
+            assert_results_equal(results, {name: data[:state.years] for name, data in full.items()})
+            hits += 1
+    finally:
+        stop.set()
+        writer.join()
+        cache.close()
+    assert hits > 0
+
+
+def _hold_lock(path, locked, release):
+    # Every slot, as a writer would lock one (the rest of the file marks it live)
+    fd = os.open(path, os.O_RDWR)
+    fcntl.lockf(fd, fcntl.LOCK_EX, 8 * SLOT_SIZE)
+    locked.set()
+    release.wait()
+    fcntl.lockf(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def test_write_is_skipped_while_slot_is_busy(tmp_path):
+    path = tmp_path / 'cache'
+    cache = open_cache(path)
+    sim = make_simulation(years=10, samples=50, seed=1)
+    key = scenario_key(sim)
+
+    locked, release = context.Event(), context.Event()
+    holder = context.Process(target=_hold_lock, args=(str(path), locked, release))
+    holder.start()
+    try:
+        assert locked.wait(5)
+        cache.run(sim)
+        assert cache._read_shared(key) is None
+    finally:
+        release.set()
+        holder.join()
+
+    # Local cache still serves it; the next store publishes it
+    cache._store(key, cache._entries[key])
+    assert cache._read_shared(key) is not None
+    cache.close()
+
+
+def test_entries_from_other_model_versions_are_ignored(tmp_path, monkeypatch):
+    cache = open_cache(tmp_path / 'cache')
+    sim = make_simulation(years=10, samples=50, seed=1)
+    cache.run(sim)
+
+    monkeypatch.setattr(simulation_cache, 'MODEL_FINGERPRINT', bytes(16))
+    assert cache._read_shared(scenario_key(sim)) is None
+    cache.close()
+
+
+def test_refuses_files_other_users_can_access(tmp_path):
+    path = tmp_path / 'cache'
+    path.touch()
+    path.chmod(0o666)
+    with pytest.raises(PermissionError):
+        open_cache(path)
+
+    target = tmp_path / 'target'
+    target.touch(mode=0o600)
+    link = tmp_path / 'link'
+    link.symlink_to(target)
+    with pytest.raises(OSError):
+        open_cache(link)
+
+
+def test_cached_results_survive_workspace_reuse():
+    cache = SimulationCache()
+    workspace = SimulationWorkspace(50)
+    results, _ = cache.run(make_simulation(years=10, samples=50, seed=1, workspace=workspace))
+    expected = {key: data.copy() for key, data in results.items()}
+
+    # A later run in the same workspace must not overwrite the cached arrays
+    make_simulation(years=10, samples=50, seed=2, workspace=workspace).run_simulation()
+    results, _ = cache.run(make_simulation(years=10, samples=50, seed=3))
+    assert_results_equal(results, expected)
+
+
+def test_cache_is_bounded_by_memory():
+    def run_bytes(years, samples):
+        return len(RESULT_KEYS) * years * samples * 8
+
+    cache = SimulationCache(max_entries=32, max_bytes=run_bytes(10, 51) + run_bytes(10, 52))
+    sims = [make_simulation(years=10, samples=samples, seed=1) for samples in (50, 51, 52)]
+    for sim in sims:
+        cache.run(sim)
+
+    # The least recently used run is evicted to make room
+    assert list(cache._entries) == [scenario_key(sim) for sim in sims[1:]]
+
+    # A run larger than the whole budget is not cached and evicts nothing
+    cache.run(make_simulation(years=30, samples=50, seed=1))
+    assert list(cache._entries) == [scenario_key(sim) for sim in sims[1:]]
+    assert cache._bytes == cache.max_bytes
+
+
+def test_stale_cleanup_keeps_other_layouts_of_the_current_model(tmp_path):
+    prefix = f'{simulation_cache._FILE_PREFIX}-{os.geteuid()}-'
+    current = prefix + simulation_cache.MODEL_FINGERPRINT.hex()[:16]
+    names = [f'{current}-64x1024', f'{current}-8x4096', f'{prefix}0123456789abcdef-64x1024',
+             'unrelated-file']
+    for name in names:
+        (tmp_path / name).touch()
+
+    simulation_cache._remove_stale_shared_caches(str(tmp_path / names[0]))
+    assert sorted(os.listdir(tmp_path)) == sorted(names[:2] + names[3:])